@@ -0,0 +1,205 @@
+import asyncio
+import csv
+import logging
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+import aiohttp
+from email_scraper import WebEmailScraper
+from page_fetcher import USER_AGENT, StaticPage, looks_js_rendered
+from phone_scraper import WebPhoneScraper
+from result_cache import WebsiteResultCache
+
+logger = logging.getLogger(__name__)
+
+RESULT_FIELDS = ['Email', 'Phone']
+
+
+class AsyncCsvDataEnricher:
+    """
+    Enriches company CSV data with an asyncio HTTP crawl.
+
+    Rows are streamed from the input CSV, many websites are crawled at once
+    under global and per-domain concurrency limits, and each row is written
+    to the output CSV as soon as its crawl finishes. Pages are fetched over
+    plain HTTP only; sites that need JavaScript are left for the Selenium engine.
+    """
+
+    def __init__(
+        self,
+        input_csv_path: str,
+        output_csv_path: str,
+        sites_in_flight: int = 50,
+        global_concurrency: int = 200,
+        per_domain_concurrency: int = 4,
+        timeout: float = 15.0,
+        result_cache: Optional[WebsiteResultCache] = None,
+    ):
+        """
+        Args:
+            input_csv_path: Path to the company CSV file
+            output_csv_path: Path the enriched rows are streamed to
+            sites_in_flight: Number of websites crawled at the same time
+            global_concurrency: Maximum open HTTP requests overall
+            per_domain_concurrency: Maximum open HTTP requests per domain
+            timeout: Total timeout per HTTP request in seconds
+            result_cache: Optional cross-run cache consulted before crawling
+        """
+        self.input_csv_path = input_csv_path
+        self.output_csv_path = output_csv_path
+        self.sites_in_flight = sites_in_flight
+        self.global_concurrency = global_concurrency
+        self.per_domain_concurrency = per_domain_concurrency
+        self.timeout = timeout
+        self.result_cache = result_cache
+        self._domain_semaphores: Dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(self.per_domain_concurrency)
+        )
+        self.stats = defaultdict(int)
+
+    def process_companies(self) -> Dict[str, int]:
+        """Run the crawl to completion and return run statistics."""
+        return asyncio.run(self.run())
+
+    async def run(self) -> Dict[str, int]:
+        """Stream rows through the crawl pipeline and into the output CSV."""
+        rows: asyncio.Queue = asyncio.Queue(maxsize=self.sites_in_flight * 2)
+        connector = aiohttp.TCPConnector(limit=self.global_concurrency, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        with open(self.input_csv_path, newline='', encoding='utf-8') as input_file, \
+                open(self.output_csv_path, 'w', newline='', encoding='utf-8') as output_file:
+            reader = csv.DictReader(input_file)
+            fieldnames = list(reader.fieldnames or [])
+            fieldnames += [field for field in RESULT_FIELDS if field not in fieldnames]
+            writer = csv.DictWriter(output_file, fieldnames=fieldnames)
+            writer.writeheader()
+
+            async with aiohttp.ClientSession(
+                connector=connector,
+                timeout=timeout,
+                headers={"User-Agent": USER_AGENT},
+            ) as session:
+                workers = [
+                    asyncio.create_task(self._worker(session, rows, writer, output_file))
+                    for _ in range(self.sites_in_flight)
+                ]
+                for row in reader:
+                    await rows.put(row)
+                for _ in workers:
+                    await rows.put(None)
+                await asyncio.gather(*workers)
+
+        logger.info(f"Async enrichment finished: {dict(self.stats)}")
+        return dict(self.stats)
+
+    async def _worker(self, session: aiohttp.ClientSession, rows: asyncio.Queue, writer: csv.DictWriter, output_file):
+        while True:
+            row = await rows.get()
+            if row is None:
+                return
+
+            website = (row.get('Website') or '').strip()
+            results = {field: None for field in RESULT_FIELDS}
+            cached = self.result_cache.get(website) if website and self.result_cache else None
+            if cached is not None:
+                results = {field: cached[field] for field in RESULT_FIELDS}
+                self.stats['cache_hits'] += 1
+            elif website:
+                try:
+                    results = await self._crawl(session, website)
+                except Exception as e:
+                    logger.error(f"Error processing {row.get('Company Name')}: {str(e)}")
+                    self.stats['errors'] += 1
+
+            row.update({field: value or '' for field, value in results.items()})
+            # The event loop is single threaded, so rows never interleave
+            writer.writerow(row)
+            output_file.flush()
+            self.stats['rows'] += 1
+            if any(results.values()):
+                self.stats['enriched'] += 1
+
+    async def _crawl(self, session: aiohttp.ClientSession, website: str) -> Dict[str, Optional[str]]:
+        """Crawl the main page, then all likely contact pages concurrently."""
+        extractors = self._build_extractors()
+        found: Dict[str, Tuple[str, str]] = {}
+
+        logger.info(f"Checking main page: {website}")
+        page = await self._fetch_page(session, website)
+        if page is None:
+            # Unreachable sites are not cached so the next run tries again
+            return {name: None for name in extractors}
+        js_rendered = self._is_js_rendered(page)
+        await asyncio.to_thread(self._run_extractors, extractors, page, website, found)
+
+        if len(found) < len(extractors):
+            links = []
+            for link in extractors['Email'].find_contact_pages(page):
+                if link != website and link not in links:
+                    links.append(link)
+
+            pages = await asyncio.gather(*(self._fetch_page(session, link) for link in links))
+            # Keep link order so results match the sequential engine's priority
+            for link, contact_page in zip(links, pages):
+                if contact_page is None:
+                    continue
+                js_rendered = self._is_js_rendered(contact_page) or js_rendered
+                await asyncio.to_thread(self._run_extractors, extractors, contact_page, link, found)
+                if len(found) == len(extractors):
+                    break
+
+        # The cache is shared with the Selenium engine, so misses and pages that
+        # need a browser are not cached; that engine can still render them
+        if self.result_cache is not None and found and not js_rendered:
+            email, email_source_url = found.get('Email', (None, None))
+            phone, phone_source_url = found.get('Phone', (None, None))
+            self.result_cache.put(website, email, phone, email_source_url, phone_source_url)
+
+        return {name: found[name][0] if name in found else None for name in extractors}
+
+    @staticmethod
+    def _build_extractors() -> Dict[str, object]:
+        # Extractors keep the page they run on as state, so each crawl gets its own
+        return {
+            'Email': WebEmailScraper(None),
+            'Phone': WebPhoneScraper(None),
+        }
+
+    def _is_js_rendered(self, page: StaticPage) -> bool:
+        if looks_js_rendered(page):
+            self.stats['js_rendered_pages'] += 1
+            return True
+        return False
+
+    @staticmethod
+    def _run_extractors(extractors: Dict, page: StaticPage, url: str, found: Dict[str, Tuple[str, str]]):
+        for name, extractor in extractors.items():
+            if name in found:
+                continue
+            best_result, _ = extractor.extract_from(page, url)
+            if best_result:
+                found[name] = (best_result, url)
+
+    async def _fetch_page(self, session: aiohttp.ClientSession, url: str) -> Optional[StaticPage]:
+        """Fetch and parse a page under the per-domain concurrency limit."""
+        domain = urlparse(url).netloc.lower()
+        if domain.startswith("www."):
+            domain = domain[4:]
+
+        async with self._domain_semaphores[domain]:
+            try:
+                async with session.get(url, allow_redirects=True) as response:
+                    content_type = response.headers.get("Content-Type", "")
+                    if response.status >= 400 or "html" not in content_type.lower():
+                        self.stats['fetch_failures'] += 1
+                        return None
+                    html = await response.text(errors="replace")
+                    final_url = str(response.url)
+            except (aiohttp.ClientError, asyncio.TimeoutError, UnicodeDecodeError) as e:
+                logger.debug(f"HTTP fetch failed for {url}: {str(e)}")
+                self.stats['fetch_failures'] += 1
+                return None
+
+        self.stats['pages'] += 1
+        return await asyncio.to_thread(StaticPage, html, final_url)
@@ -1,13 +1,17 @@
 from abc import ABC, abstractmethod
-from typing import Set, Optional, Tuple
+from typing import List, Set, Optional, Tuple
 import logging
 from selenium.webdriver.common.by import By
+from page_fetcher import PageFetcher, SeleniumPageFetcher
 
 logger = logging.getLogger(__name__)
 
 class BaseScraper(ABC):
-    def __init__(self, driver):
+    def __init__(self, driver, fetcher: Optional[PageFetcher] = None):
+        # self.driver is the handle of the page currently loaded: the browser
+        # itself, or a StaticPage when the fetcher served it over HTTP
         self.driver = driver
+        self.fetcher = fetcher or SeleniumPageFetcher(driver)
         self.contact_page_keywords = [
             "contact",
             "about",
@@ -45,28 +49,56 @@ class BaseScraper(ABC):
         logger.info(f"Checking main page: {target_url}")
         
         # Check main page first
-        self.driver.get(target_url)
-        main_page_results = self._collect_from_page()
-        
-        if main_page_results:
-            best_result = self._process_results(main_page_results, target_url)
-            if best_result:
-                return best_result, target_url
+        best_result = self._scrape_page(target_url)
+        if best_result:
+            return best_result, target_url
                 
         # Check contact pages if nothing found
         contact_links = self._find_potential_contact_pages()
         
         for link in contact_links:
             logger.info(f"Checking contact page: {link}")
-            self.driver.get(link)
-            contact_page_results = self._collect_from_page()
-            
-            if contact_page_results:
-                best_result = self._process_results(contact_page_results, link)
-                if best_result:
-                    return best_result, link
+            best_result = self._scrape_page(link)
+            if best_result:
+                return best_result, link
                     
         return None, target_url
+
+    def _scrape_page(self, url: str) -> Optional[str]:
+        """Load a page through the fetcher and return the best result on it."""
+        page = self.fetcher.load(url)
+        best_result, had_candidates = self.extract_from(page, url)
+
+        # Static HTML without any candidates gets a second look in the browser
+        if not had_candidates and self.fetcher.is_static(page):
+            rendered = self.fetcher.render(url)
+            if rendered is not None:
+                logger.info(f"No candidates in static HTML, rendering in browser: {url}")
+                best_result, _ = self.extract_from(rendered, url)
+
+        return best_result
+
+    def extract_from(self, page, source_url: str) -> Tuple[Optional[str], bool]:
+        """
+        Run the extractor against an already loaded page.
+
+        Args:
+            page: Browser or StaticPage handle with the page loaded
+            source_url: URL the page was loaded from
+
+        Returns:
+            Best result or None, and whether any candidates were found
+        """
+        self.driver = page
+        results = self._collect_from_page()
+        if not results:
+            return None, False
+        return self._process_results(results, source_url), True
+
+    def find_contact_pages(self, page) -> List[str]:
+        """Find likely contact page URLs on an already loaded page."""
+        self.driver = page
+        return self._find_potential_contact_pages()
     
     @abstractmethod
     def _collect_from_page(self) -> Set[str]:
@@ -0,0 +1,84 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointJournal:
+    """
+    Append-only journal of per-row enrichment results.
+
+    Each finished row is written as one JSON line and fsync'd, so a crash
+    loses at most the row in progress. The journal lives next to the input
+    CSV and is removed once every row has a result saved in the output file.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Path of the JSON Lines journal file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_input(cls, input_csv_path: str) -> "CheckpointJournal":
+        """Create the sidecar journal for an input CSV file."""
+        return cls(f"{input_csv_path}.checkpoint.jsonl")
+
+    def load(self) -> Dict[int, dict]:
+        """
+        Read completed rows from the journal.
+
+        Returns:
+            Mapping of row index to {"website": ..., "result": {...}}
+        """
+        completed = {}
+        if not os.path.exists(self.path):
+            return completed
+
+        self._truncate_torn_tail()
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                    completed[int(entry["row"])] = {
+                        "website": entry["website"],
+                        "result": entry["result"],
+                    }
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                    # Skip corrupted entries rather than failing the whole resume
+                    logger.warning(f"Ignoring unreadable checkpoint line {line_number} in {self.path}")
+
+        logger.info(f"Loaded {len(completed)} completed rows from {self.path}")
+        return completed
+
+    def _truncate_torn_tail(self):
+        """Cut off a partial last line so new entries start on a fresh line."""
+        with self._lock:
+            with open(self.path, "rb+") as f:
+                data = f.read()
+                if data and not data.endswith(b"\n"):
+                    f.truncate(data.rfind(b"\n") + 1)
+                    logger.warning(f"Discarded a partially written entry at the end of {self.path}")
+
+    def append(self, row_index: int, website: str, result: dict):
+        """Durably record the result for one row."""
+        line = json.dumps({"row": int(row_index), "website": website, "result": result})
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def remove(self):
+        """Delete the journal once its results have been saved."""
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
@@ -0,0 +1,94 @@
+import logging
+from typing import Dict, Optional, Set, Tuple
+from base_scraper import BaseScraper
+from page_fetcher import PageFetcher
+
+logger = logging.getLogger(__name__)
+
+
+class ContactCrawler:
+    """
+    Crawls a website once for several kinds of contact data.
+
+    Each page is loaded a single time and every registered extractor runs
+    against that same page. The crawl stops as soon as every extractor has
+    a result.
+    """
+
+    def __init__(self, fetcher: PageFetcher, extractors: Optional[Dict[str, BaseScraper]] = None):
+        """
+        Args:
+            fetcher: Page fetcher used to load every URL
+            extractors: Mapping of result name (e.g. "Email") to extractor
+        """
+        self.fetcher = fetcher
+        self.extractors: Dict[str, BaseScraper] = dict(extractors or {})
+
+    def register(self, name: str, extractor: BaseScraper):
+        """Add an extractor whose result is reported under the given name."""
+        self.extractors[name] = extractor
+
+    def crawl(self, target_url: str) -> Dict[str, Tuple[Optional[str], str]]:
+        """
+        Crawl the main page, then likely contact pages, until all extractors are satisfied.
+
+        Args:
+            target_url: Website to crawl
+
+        Returns:
+            Mapping of extractor name to (best result or None, source URL)
+        """
+        found: Dict[str, Tuple[str, str]] = {}
+
+        logger.info(f"Checking main page: {target_url}")
+        page = self._scan(target_url, found)
+        visited = {target_url}
+
+        if not self._is_complete(found):
+            # Any extractor can read links off the page; they share the same DOM
+            link_finder = next(iter(self.extractors.values()))
+            for link in link_finder.find_contact_pages(page):
+                if link in visited:
+                    continue
+                visited.add(link)
+                logger.info(f"Checking contact page: {link}")
+                self._scan(link, found)
+                if self._is_complete(found):
+                    break
+
+        return {
+            name: found.get(name, (None, target_url))
+            for name in self.extractors
+        }
+
+    def _scan(self, url: str, found: Dict[str, Tuple[str, str]]):
+        """Load a page once and run every extractor that still needs a result."""
+        page = self.fetcher.load(url)
+        without_candidates = self._run_extractors(page, url, found, self._pending(found))
+
+        # Static HTML without candidates for some extractor gets rendered once
+        if without_candidates and self.fetcher.is_static(page):
+            rendered = self.fetcher.render(url)
+            if rendered is not None:
+                logger.info(f"No candidates in static HTML, rendering in browser: {url}")
+                page = rendered
+                self._run_extractors(page, url, found, without_candidates)
+
+        return page
+
+    def _run_extractors(self, page, url: str, found: Dict[str, Tuple[str, str]], names: Set[str]) -> Set[str]:
+        """Run the named extractors on a page and return those that found no candidates."""
+        without_candidates = set()
+        for name in names:
+            best_result, had_candidates = self.extractors[name].extract_from(page, url)
+            if best_result:
+                found[name] = (best_result, url)
+            elif not had_candidates:
+                without_candidates.add(name)
+        return without_candidates
+
+    def _pending(self, found: Dict[str, Tuple[str, str]]) -> Set[str]:
+        return {name for name in self.extractors if name not in found}
+
+    def _is_complete(self, found: Dict[str, Tuple[str, str]]) -> bool:
+        return not self._pending(found)
@@ -1,33 +1,64 @@
 import pandas as pd
 import logging
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Dict, List, Optional
+from checkpoint import CheckpointJournal
+from contact_crawler import ContactCrawler
 from email_scraper import WebEmailScraper
+from page_fetcher import HttpPageFetcher, HybridPageFetcher, SeleniumPageFetcher
 from phone_scraper import WebPhoneScraper
+from result_cache import WebsiteResultCache
 
 logger = logging.getLogger(__name__)
 
 class CsvDataEnricher:
     """Enriches Homestar company data with email addresses."""
     
-    def __init__(self, driver, input_csv_path: str):
+    def __init__(
+        self,
+        driver,
+        input_csv_path: str,
+        http_fetcher: Optional[HttpPageFetcher] = None,
+        journal: Optional[CheckpointJournal] = None,
+        result_cache: Optional[WebsiteResultCache] = None,
+    ):
         """
         Initialize the enricher with WebDriver and CSV path.
         
         Args:
             driver: Selenium WebDriver instance
             input_csv_path: Path to the Homestar CSV file
+            http_fetcher: Optional HTTP fetcher; when given, pages are fetched
+                over HTTP first and only rendered in the browser if needed
+            journal: Optional checkpoint journal; finished rows are recorded
+                in it and rows already in it are not crawled again
+            result_cache: Optional cross-run cache; fresh entries for a
+                website's domain are used instead of crawling it
         """
         self.driver = driver
-        self.email_scraper = WebEmailScraper(driver)
-        self.phone_scraper = WebPhoneScraper(driver)
+        self.input_csv_path = input_csv_path
+        self.journal = journal
+        self.result_cache = result_cache
+        self.http_fetcher = http_fetcher
+        self.crawler = self._build_crawler(driver)
         self.df = pd.read_csv(input_csv_path)
+        # Rows with a result in the journal, from this run or an earlier one
+        self._recorded_rows = set()
+        # undetected-chromedriver patches its binary on start, so drivers
+        # must not be created concurrently
+        self._driver_factory_lock = threading.Lock()
         
     def process_companies(self):
         """Process all companies in the dataset."""
+        completed = self._load_completed_rows()
+
         # Process only companies with valid websites
         results = self.df.apply(
-            lambda row: pd.Series(self._process_single_company(row))
+            lambda row: pd.Series(completed.get(row.name) or self._process_single_company(row))
             if pd.notna(row['Website']) else pd.Series({'Email': None, 'Phone': None}),
             axis=1
         )
@@ -36,22 +67,143 @@ class CsvDataEnricher:
         self.df['Email'] = results['Email']
         self.df['Phone'] = results['Phone']
     
+    def process_companies_parallel(
+        self,
+        driver_factory: Callable,
+        workers: int,
+        shard_size: int = 25,
+        max_driver_restarts: int = 3,
+    ):
+        """
+        Process all companies on a pool of WebDriver instances.
+
+        Rows with a website are split into shards that workers pull from a
+        shared queue. Each worker owns its own driver; if that driver crashes
+        it is restarted and the worker resumes the shard at the row it was on.
+
+        Args:
+            driver_factory: Callable returning a new WebDriver instance
+            workers: Number of drivers to run concurrently
+            shard_size: Number of rows handed to a worker at a time
+            max_driver_restarts: Restarts allowed per row before it is given up
+        """
+        completed = self._load_completed_rows()
+        pending = [
+            idx for idx in self.df.index
+            if pd.notna(self.df.at[idx, 'Website']) and idx not in completed
+        ]
+        shards = queue.Queue()
+        for start in range(0, len(pending), shard_size):
+            shards.put(pending[start:start + shard_size])
+        logger.info(
+            f"Processing {len(pending)} companies in {shards.qsize()} shards "
+            f"with {workers} workers"
+        )
+
+        results = dict(completed)
+        results_lock = threading.Lock()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    self._run_worker,
+                    worker_id,
+                    driver_factory,
+                    shards,
+                    results,
+                    results_lock,
+                    max_driver_restarts,
+                )
+                for worker_id in range(1, workers + 1)
+            ]
+            for future in futures:
+                future.result()
+
+        if not shards.empty():
+            logger.error(f"{shards.qsize()} shards were left unprocessed: all workers failed")
+
+        # Merge results back in row order
+        self.df['Email'] = [results.get(idx, {}).get('Email') for idx in self.df.index]
+        self.df['Phone'] = [results.get(idx, {}).get('Phone') for idx in self.df.index]
+
+    def _run_worker(
+        self,
+        worker_id: int,
+        driver_factory: Callable,
+        shards: queue.Queue,
+        results: Dict,
+        results_lock: threading.Lock,
+        max_driver_restarts: int,
+    ):
+        """Drain shards from the queue on a dedicated driver."""
+        driver = None
+        try:
+            while True:
+                try:
+                    remaining: List = list(shards.get_nowait())
+                except queue.Empty:
+                    return
+
+                restarts = 0
+                while remaining:
+                    if driver is None:
+                        try:
+                            with self._driver_factory_lock:
+                                driver = driver_factory()
+                        except Exception as e:
+                            logger.error(f"Worker {worker_id} could not start a driver: {str(e)}")
+                            # Hand the unfinished rows to the remaining workers
+                            shards.put(remaining)
+                            return
+                        crawler = self._build_crawler(driver)
+
+                    idx = remaining[0]
+                    row = self.df.loc[idx]
+                    try:
+                        result = self._scrape_contacts(crawler, row)
+                        self._record_row(idx, row, result)
+                    except Exception as e:
+                        if self._driver_alive(driver):
+                            logger.error(f"Error processing {row['Company Name']}: {str(e)}")
+                            result = {'Email': None, 'Phone': None}
+                        else:
+                            logger.warning(
+                                f"Worker {worker_id} driver crashed on {row['Company Name']}, restarting"
+                            )
+                            self._quit_driver(driver)
+                            driver = None
+                            restarts += 1
+                            if restarts <= max_driver_restarts:
+                                continue
+                            logger.error(f"Giving up on {row['Company Name']} after {max_driver_restarts} restarts")
+                            result = {'Email': None, 'Phone': None}
+
+                    with results_lock:
+                        results[idx] = result
+                    remaining.pop(0)
+                    restarts = 0
+        finally:
+            if driver is not None:
+                self._quit_driver(driver)
+
+    def _build_crawler(self, driver) -> ContactCrawler:
+        """Create a crawler running all contact extractors on one page load."""
+        if self.http_fetcher is not None:
+            fetcher = HybridPageFetcher(driver, self.http_fetcher)
+        else:
+            fetcher = SeleniumPageFetcher(driver)
+        return ContactCrawler(fetcher, {
+            'Email': WebEmailScraper(driver, fetcher),
+            'Phone': WebPhoneScraper(driver, fetcher),
+        })
+
     def _process_single_company(self, row: pd.Series) -> dict:
         """Process a single company and return its contact information."""
-        website = row['Website']
         company_name = row['Company Name']
         
         try:
-            # Extract email
-            email, _ = self.email_scraper.scrape_strategically(website)
-            
-            # Extract phone
-            phone, _ = self.phone_scraper.scrape_strategically(website)
-                
-            return {
-                'Email': email,
-                'Phone': phone
-            }
+            result = self._scrape_contacts(self.crawler, row)
+            self._record_row(row.name, row, result)
+            return result
             
         except Exception as e:
             logger.error(f"Error processing {company_name}: {str(e)}")
@@ -60,6 +212,76 @@ class CsvDataEnricher:
                 'Phone': None
             }
 
+    def _scrape_contacts(self, crawler: ContactCrawler, row: pd.Series) -> dict:
+        """Crawl a row's website once for both email and phone, using the cache if present."""
+        website = row['Website']
+        if self.result_cache is not None:
+            cached = self.result_cache.get(website)
+            if cached is not None:
+                logger.info(f"Using cached result for {website}")
+                return {'Email': cached['Email'], 'Phone': cached['Phone']}
+
+        results = crawler.crawl(website)
+        # Chrome renders DNS and connection failures as error pages instead of
+        # raising, so a crawl that found nothing may be a network blip; only
+        # cache hits so such sites are tried again on the next run
+        if self.result_cache is not None and (results['Email'][0] or results['Phone'][0]):
+            self.result_cache.put(
+                website,
+                results['Email'][0],
+                results['Phone'][0],
+                email_source_url=results['Email'][1] if results['Email'][0] else None,
+                phone_source_url=results['Phone'][1] if results['Phone'][0] else None,
+            )
+        return {
+            name: value
+            for name, (value, _) in results.items()
+        }
+
+    def _load_completed_rows(self) -> Dict:
+        """Results of rows finished in a previous run, by row index."""
+        if self.journal is None:
+            return {}
+
+        completed = {}
+        for idx, entry in self.journal.load().items():
+            # Only trust entries that still line up with the current file
+            if idx in self.df.index and entry['website'] == self.df.at[idx, 'Website']:
+                completed[idx] = entry['result']
+        if completed:
+            logger.info(f"Resuming: {len(completed)} rows already processed")
+        self._recorded_rows.update(completed)
+        return completed
+
+    def _record_row(self, idx, row: pd.Series, result: dict):
+        """Append a successfully crawled row to the checkpoint journal."""
+        if self.journal is not None:
+            self.journal.append(idx, row['Website'], result)
+        self._recorded_rows.add(idx)
+
+    def unrecorded_rows(self) -> int:
+        """Count rows with a website that have no recorded result, e.g. after errors or failed workers."""
+        return sum(
+            1 for idx in self.df.index
+            if pd.notna(self.df.at[idx, 'Website']) and idx not in self._recorded_rows
+        )
+
+    @staticmethod
+    def _driver_alive(driver) -> bool:
+        """Check whether the WebDriver session still responds."""
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit_driver(driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug(f"Error closing driver: {str(e)}")
+
     def save_results(self, output_path: Optional[str] = None) -> None:
         """
         Save the enriched data to a new CSV file.
@@ -72,5 +294,9 @@ class CsvDataEnricher:
             input_path = Path(self.input_csv_path)
             output_path = input_path.parent / f"{input_path.stem}_enriched{input_path.suffix}"
         
-        self.df.to_csv(output_path, index=False)
-        logger.info(f"Saved enriched data to {output_path}") 
\ No newline at end of file
+        # Write next to the target and swap it in, so a crash mid-write
+        # never leaves a truncated CSV behind
+        temp_path = f"{output_path}.tmp"
+        self.df.to_csv(temp_path, index=False)
+        os.replace(temp_path, output_path)
+        logger.info(f"Saved enriched data to {output_path}") 
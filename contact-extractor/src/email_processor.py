@@ -1,8 +1,8 @@
 import re
-import dns.resolver
 from urllib.parse import urlparse
 import logging
 from typing import List, Optional, Set
+from mx_cache import MxRecordCache, get_default_mx_cache
 
 logger = logging.getLogger(__name__)
 
@@ -10,7 +10,9 @@ logger = logging.getLogger(__name__)
 class EmailProcessor:
     """Handles email validation, cleaning, and selection of the best matching email."""
 
-    def __init__(self):
+    def __init__(self, mx_cache: Optional[MxRecordCache] = None):
+        # MX answers are shared across processors unless a cache is given
+        self.mx_cache = mx_cache or get_default_mx_cache()
         self.email_pattern = re.compile(
             r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
         )
@@ -93,11 +95,7 @@ class EmailProcessor:
         Returns:
             bool: True if MX record exists, False otherwise
         """
-        try:
-            dns.resolver.resolve(domain, "MX")
-            return True
-        except Exception:
-            return False
+        return self.mx_cache.has_mx(domain)
 
     def select_best_email(self, emails: Set[str], page_url: str) -> Optional[str]:
         """
@@ -121,6 +119,11 @@ class EmailProcessor:
         except Exception:
             page_domain = ""
 
+        # Resolve every candidate domain up front, concurrently and cached
+        mx_results = self.mx_cache.has_mx_many(
+            email.split("@")[1] for email in emails
+        )
+
         # Priority scoring for emails
         scored_emails = []
         for email in emails:
@@ -132,7 +135,7 @@ class EmailProcessor:
                 score += 100
 
             # Medium priority: has valid MX record
-            if self._check_mx_record(email_domain):
+            if mx_results.get(email_domain.lower().strip(".")):
                 score += 50
 
             # Lower priority: common business email patterns
@@ -11,9 +11,9 @@ logger = logging.getLogger(__name__)
 class WebEmailScraper(BaseScraper):
     """A class to handle email extraction from web pages."""
 
-    def __init__(self, driver):
-        """Initialize the extractor with a webdriver instance."""
-        super().__init__(driver)
+    def __init__(self, driver, fetcher=None):
+        """Initialize the extractor with a webdriver instance and optional page fetcher."""
+        super().__init__(driver, fetcher)
         self.email_regex = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
         self.email_processor = EmailProcessor()
 
@@ -1,8 +1,13 @@
+import argparse
 import logging
 import os
 from datetime import datetime
 import undetected_chromedriver as uc
+from async_enricher import AsyncCsvDataEnricher
+from checkpoint import CheckpointJournal
 from data_enricher import CsvDataEnricher
+from page_fetcher import HttpPageFetcher
+from result_cache import WebsiteResultCache
 import pandas as pd
 
 def setup_logger(log_dir):
@@ -43,6 +48,9 @@ def initialize_driver():
 def find_latest_csv(directory: str) -> str:
     """Find the most recent CSV file in the specified directory.
     
+    Files ending in _enriched.csv are outputs of the async engine and are skipped,
+    so a later run doesn't enrich its own output again.
+    
     Args:
         directory: Directory to search for CSV files
         
@@ -52,7 +60,7 @@ def find_latest_csv(directory: str) -> str:
     Raises:
         FileNotFoundError: If no CSV files exist in the directory
     """
-    csv_files = [f for f in os.listdir(directory) if f.endswith('.csv')]
+    csv_files = [f for f in os.listdir(directory) if f.endswith('.csv') and not f.endswith('_enriched.csv')]
     if not csv_files:
         raise FileNotFoundError(f"No CSV files found in {directory}")
     
@@ -62,16 +70,63 @@ def find_latest_csv(directory: str) -> str:
     )
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Enrich company CSV data with contact details")
+    parser.add_argument(
+        "--engine",
+        choices=["selenium", "async"],
+        default="selenium",
+        help="selenium: browser-backed crawl, results saved in place; "
+        "async: concurrent HTTP-only crawl streamed to <input>_enriched.csv (default: selenium)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=50,
+        help="Websites crawled at the same time by the async engine (default: 50)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of browser drivers to run in parallel (default: 1)",
+    )
+    parser.add_argument(
+        "--fetch-mode",
+        choices=["hybrid", "browser"],
+        default="hybrid",
+        help="hybrid: fetch over HTTP and render in Chrome only when needed; "
+        "browser: load every page in Chrome (default: hybrid)",
+    )
+    parser.add_argument(
+        "--cache-max-age-days",
+        type=float,
+        default=30,
+        help="Reuse cached results for websites crawled within this many days (default: 30)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Crawl every website even if a cached result exists",
+    )
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+
     # Setup logging
     os.makedirs("logs", exist_ok=True)
     logger = setup_logger("logs")
     logger.info("Starting Homestar Email Enrichment")
     
     driver = None
+    http_fetcher = None
+    result_cache = None
     try:
-        # Initialize driver
-        driver = initialize_driver()
+        # Initialize driver; in pool mode each worker starts its own
+        if args.engine == "selenium" and args.workers <= 1:
+            driver = initialize_driver()
         
         # Find and validate input file
         input_dir = "input"
@@ -84,13 +139,53 @@ def main():
             logger.error(f"Failed to find input CSV: {e}")
             return
         
+        if not args.no_cache:
+            result_cache = WebsiteResultCache(max_age_days=args.cache_max_age_days)
+
+        if args.engine == "async":
+            output_path = os.path.splitext(input_path)[0] + "_enriched.csv"
+            try:
+                enricher = AsyncCsvDataEnricher(
+                    input_path,
+                    output_path,
+                    sites_in_flight=args.concurrency,
+                    result_cache=result_cache,
+                )
+                stats = enricher.process_companies()
+                logger.info(f"Streamed enriched data to {output_path}: {stats}")
+            except Exception as e:
+                logger.error(f"Error during async enrichment process: {str(e)}")
+            return
+
         # Create enricher instance and process
         try:
-            enricher = CsvDataEnricher(driver, input_path)
-            enricher.process_companies()
+            if args.fetch_mode == "hybrid":
+                http_fetcher = HttpPageFetcher(pool_size=max(args.workers, 1) * 2)
+            # Finished rows are journaled so a crashed run resumes where it stopped
+            journal = CheckpointJournal.for_input(input_path)
+            enricher = CsvDataEnricher(
+                driver,
+                input_path,
+                http_fetcher=http_fetcher,
+                journal=journal,
+                result_cache=result_cache,
+            )
+            if args.workers > 1:
+                logger.info(f"Running with {args.workers} parallel workers")
+                enricher.process_companies_parallel(initialize_driver, args.workers)
+            else:
+                enricher.process_companies()
             
             # Save results back to the same file
             enricher.save_results(input_path)
+            unrecorded = enricher.unrecorded_rows()
+            if unrecorded:
+                # Keep the journal so the next run only retries the missing rows
+                logger.warning(
+                    f"{unrecorded} rows have no result; kept {journal.path}, run again to resume"
+                )
+            else:
+                journal.remove()
             logger.info(f"Successfully updated {input_path} with email data")
             
         except pd.errors.EmptyDataError:
@@ -99,6 +194,10 @@ def main():
             logger.error(f"Error during enrichment process: {str(e)}")
             
     finally:
+        if result_cache:
+            result_cache.close()
+        if http_fetcher:
+            http_fetcher.close()
         if driver:
             driver.quit()
             logger.info("Driver closed")
@@ -0,0 +1,184 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+import dns.resolver
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join("cache", "mx_records.sqlite")
+
+# Answers that say something definite about the domain; anything else
+# (timeouts, unreachable nameservers) is transient and never cached
+NEGATIVE_ANSWERS = (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer)
+
+
+class MxRecordCache:
+    """
+    Caches MX record lookups in memory and on disk.
+
+    Recent answers live in an LRU dict; every answer is also persisted to a
+    SQLite file so they survive restarts. Positive and negative answers
+    expire after separate TTLs.
+    """
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        max_memory_entries: int = 10000,
+        positive_ttl: float = 7 * 24 * 3600,
+        negative_ttl: float = 24 * 3600,
+        resolver_timeout: float = 2.0,
+        resolver_lifetime: float = 4.0,
+        max_parallel_lookups: int = 8,
+    ):
+        """
+        Args:
+            db_path: SQLite file backing the cache
+            max_memory_entries: Size of the in-memory LRU
+            positive_ttl: Seconds a domain with MX records stays cached
+            negative_ttl: Seconds a domain without MX records stays cached
+            resolver_timeout: Seconds to wait for a single nameserver
+            resolver_lifetime: Total seconds allowed for one lookup
+            max_parallel_lookups: Concurrent lookups in has_mx_many
+        """
+        self.max_memory_entries = max_memory_entries
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_parallel_lookups = max_parallel_lookups
+
+        self._memory: "OrderedDict[str, Tuple[bool, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS mx_records ("
+            "domain TEXT PRIMARY KEY, has_mx INTEGER NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+        self._resolver = dns.resolver.Resolver()
+        self._resolver.timeout = resolver_timeout
+        self._resolver.lifetime = resolver_lifetime
+
+    def has_mx(self, domain: str) -> bool:
+        """
+        Check if domain has valid MX records.
+
+        Args:
+            domain: Domain to check
+
+        Returns:
+            bool: True if MX record exists, False otherwise
+        """
+        domain = domain.lower().strip(".")
+        cached = self._get_cached(domain)
+        if cached is not None:
+            return cached
+
+        has_mx, definite = self._resolve(domain)
+        if definite:
+            self._store(domain, has_mx)
+        return has_mx
+
+    def has_mx_many(self, domains: Iterable[str]) -> Dict[str, bool]:
+        """
+        Check several domains, resolving uncached ones concurrently.
+
+        Args:
+            domains: Domains to check
+
+        Returns:
+            Mapping of each domain to whether it has MX records
+        """
+        unique_domains = {domain.lower().strip(".") for domain in domains}
+        results = {}
+        missing = []
+        for domain in unique_domains:
+            cached = self._get_cached(domain)
+            if cached is None:
+                missing.append(domain)
+            else:
+                results[domain] = cached
+
+        if len(missing) == 1:
+            results[missing[0]] = self.has_mx(missing[0])
+        elif missing:
+            workers = min(self.max_parallel_lookups, len(missing))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for domain, has_mx in zip(missing, executor.map(self.has_mx, missing)):
+                    results[domain] = has_mx
+
+        return results
+
+    def _resolve(self, domain: str) -> Tuple[bool, bool]:
+        """Look up MX records; returns (has_mx, whether the answer is cacheable)."""
+        try:
+            self._resolver.resolve(domain, "MX")
+            return True, True
+        except NEGATIVE_ANSWERS:
+            return False, True
+        except Exception as e:
+            logger.debug(f"Transient MX lookup failure for {domain}: {str(e)}")
+            return False, False
+
+    def _get_cached(self, domain: str) -> Optional[bool]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(domain)
+            if entry is not None:
+                has_mx, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(domain)
+                    return has_mx
+                del self._memory[domain]
+
+            row = self._conn.execute(
+                "SELECT has_mx, expires_at FROM mx_records WHERE domain = ?", (domain,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                return None
+
+            self._remember(domain, bool(row[0]), row[1])
+            return bool(row[0])
+
+    def _store(self, domain: str, has_mx: bool):
+        expires_at = time.time() + (self.positive_ttl if has_mx else self.negative_ttl)
+        with self._lock:
+            self._remember(domain, has_mx, expires_at)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO mx_records (domain, has_mx, expires_at) VALUES (?, ?, ?)",
+                (domain, int(has_mx), expires_at),
+            )
+            self._conn.commit()
+
+    def _remember(self, domain: str, has_mx: bool, expires_at: float):
+        """Insert into the LRU; caller must hold the lock."""
+        self._memory[domain] = (has_mx, expires_at)
+        self._memory.move_to_end(domain)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache: Optional[MxRecordCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_mx_cache() -> MxRecordCache:
+    """Return the process-wide MX cache shared by all EmailProcessor instances."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = MxRecordCache()
+        return _default_cache
@@ -0,0 +1,207 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+from urllib.parse import urljoin
+import logging
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+
+
+class StaticElement:
+    """Minimal WebElement stand-in backed by a parsed HTML tag."""
+
+    # Attributes Selenium resolves to absolute URLs
+    URL_ATTRIBUTES = {"href", "src", "action"}
+
+    def __init__(self, tag, base_url: str):
+        self._tag = tag
+        self._base_url = base_url
+
+    @property
+    def text(self) -> str:
+        return self._tag.get_text("\n", strip=True)
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        value = self._tag.get(name)
+        if value is None:
+            return None
+        if isinstance(value, list):
+            value = " ".join(value)
+        if name in self.URL_ATTRIBUTES:
+            return urljoin(self._base_url, value.strip())
+        return value
+
+
+class StaticPage:
+    """
+    Read-only, WebDriver-like view of a page fetched over plain HTTP.
+
+    Exposes the subset of the WebDriver API the scrapers rely on
+    (page_source, current_url, find_element(s)) so they can run against
+    either backend without changes.
+    """
+
+    def __init__(self, html: str, url: str):
+        self.page_source = html
+        self.current_url = url
+        self._soup = BeautifulSoup(html, "html.parser")
+        # Drop non-visible content so element text matches what a browser renders
+        for tag in self._soup(["script", "style", "template", "noscript"]):
+            tag.decompose()
+        self._raw_soup = None
+
+    def find_element(self, by: str, value: str) -> StaticElement:
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(f"No element found for {by}={value}")
+        return elements[0]
+
+    def find_elements(self, by: str, value: str) -> List[StaticElement]:
+        if by == By.TAG_NAME:
+            tags = self._soup.find_all(value)
+        elif by == By.CSS_SELECTOR:
+            tags = self._soup.select(value)
+        elif by == By.ID:
+            tags = self._soup.find_all(id=value)
+        elif by == By.CLASS_NAME:
+            tags = self._soup.find_all(class_=value)
+        else:
+            raise ValueError(f"Locator strategy not supported for static pages: {by}")
+        return [StaticElement(tag, self.current_url) for tag in tags]
+
+    def raw_soup(self) -> BeautifulSoup:
+        """Parse tree including scripts and noscript blocks."""
+        if self._raw_soup is None:
+            self._raw_soup = BeautifulSoup(self.page_source, "html.parser")
+        return self._raw_soup
+
+
+class HttpPageFetcher:
+    """Fetches pages with a pooled, keep-alive HTTP session."""
+
+    def __init__(self, timeout: float = 10.0, pool_size: int = 10):
+        """
+        Args:
+            timeout: Per-request timeout in seconds
+            pool_size: Maximum kept-alive connections per host
+        """
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+        })
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=1)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch(self, url: str) -> Optional[StaticPage]:
+        """
+        Fetch a page and parse it.
+
+        Returns:
+            StaticPage if an HTML document was retrieved, None otherwise
+        """
+        try:
+            response = self.session.get(url, timeout=self.timeout, allow_redirects=True)
+        except requests.RequestException as e:
+            logger.debug(f"HTTP fetch failed for {url}: {str(e)}")
+            return None
+
+        content_type = response.headers.get("Content-Type", "")
+        if response.status_code >= 400 or "html" not in content_type.lower():
+            logger.debug(f"HTTP fetch of {url} returned {response.status_code} ({content_type})")
+            return None
+
+        return StaticPage(response.text, response.url)
+
+    def close(self):
+        self.session.close()
+
+
+def looks_js_rendered(page: StaticPage, min_text_length: int = 200) -> bool:
+    """
+    Heuristically decide whether static HTML needs a browser to render.
+
+    Args:
+        page: Page fetched over HTTP
+        min_text_length: Visible text below this length counts as an empty shell
+
+    Returns:
+        bool: True if the page content is likely built by JavaScript
+    """
+    try:
+        body = page.find_element(By.TAG_NAME, "body")
+    except NoSuchElementException:
+        return True
+
+    if len(body.text) < min_text_length:
+        return True
+
+    # SPA mount points left empty in the static HTML
+    for selector in ("#root", "#__next", "#app", "#___gatsby"):
+        mounts = page.find_elements(By.CSS_SELECTOR, selector)
+        if mounts and not mounts[0].text:
+            return True
+
+    for noscript in page.raw_soup().find_all("noscript"):
+        if "enable javascript" in noscript.get_text(" ").lower():
+            return True
+
+    return False
+
+
+class PageFetcher(ABC):
+    """Strategy for loading a URL into something the scrapers can query."""
+
+    @abstractmethod
+    def load(self, url: str):
+        """Load a URL and return a WebDriver-like page handle."""
+        pass
+
+    def render(self, url: str):
+        """Load a URL with JavaScript rendering, or None if unsupported."""
+        return None
+
+    def is_static(self, page) -> bool:
+        """Whether the page handle came from plain HTTP rather than a browser."""
+        return isinstance(page, StaticPage)
+
+
+class SeleniumPageFetcher(PageFetcher):
+    """Loads every page in the browser."""
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def load(self, url: str):
+        self.driver.get(url)
+        return self.driver
+
+
+class HybridPageFetcher(PageFetcher):
+    """Fetches over HTTP first and falls back to the browser when needed."""
+
+    def __init__(self, driver, http_fetcher: HttpPageFetcher):
+        self.driver = driver
+        self.http_fetcher = http_fetcher
+
+    def load(self, url: str):
+        page = self.http_fetcher.fetch(url)
+        if page is None:
+            logger.info(f"Static fetch failed, rendering in browser: {url}")
+            return self.render(url)
+        if looks_js_rendered(page):
+            logger.info(f"Page looks JavaScript-rendered, rendering in browser: {url}")
+            return self.render(url)
+        return page
+
+    def render(self, url: str):
+        self.driver.get(url)
+        return self.driver
@@ -8,8 +8,8 @@ import logging
 logger = logging.getLogger(__name__)
 
 class WebPhoneScraper(BaseScraper):
-    def __init__(self, driver):
-        super().__init__(driver)
+    def __init__(self, driver, fetcher=None):
+        super().__init__(driver, fetcher)
         # Basic pattern - should be enhanced for your specific needs
         self.phone_regex = re.compile(r'\+?[\d\-\(\)\s]{10,}')
         self.phone_processor = PhoneProcessor()
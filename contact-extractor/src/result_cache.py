@@ -0,0 +1,148 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join("cache", "website_results.sqlite")
+
+# Hosts shared by many businesses; the path identifies the company there
+SHARED_HOSTS = {
+    "instagram.com",
+    "facebook.com",
+    "linkedin.com",
+    "twitter.com",
+    "x.com",
+    "youtube.com",
+    "tiktok.com",
+    "yelp.ca",
+    "yelp.com",
+    "homestars.com",
+    "sites.google.com",
+    "business.site",
+    "linktr.ee",
+}
+
+
+def normalize_domain(website: str) -> Optional[str]:
+    """
+    Normalize a website URL into a cache key.
+
+    Scheme, "www." and port are dropped so http/https and www variants of
+    a site share one entry. On hosts shared by many businesses, such as
+    social networks, the first path segment is kept to tell them apart.
+
+    Args:
+        website: Website URL as found in the CSV
+
+    Returns:
+        Cache key, or None if the URL has no host
+    """
+    website = website.strip()
+    if "://" not in website:
+        website = f"http://{website}"
+
+    parsed = urlparse(website)
+    host = (parsed.hostname or "").lower().rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    # Mobile variants of shared hosts, e.g. m.facebook.com
+    if host.startswith("m.") and host[2:] in SHARED_HOSTS:
+        host = host[2:]
+    if not host:
+        return None
+
+    if host in SHARED_HOSTS:
+        segments = [segment for segment in parsed.path.lower().split("/") if segment]
+        if segments:
+            return f"{host}/{segments[0]}"
+    return host
+
+
+class WebsiteResultCache:
+    """
+    Persistent cache of enrichment results keyed by normalized domain.
+
+    Stores the best email and phone found for a website, the pages they
+    came from and when it was crawled. Entries older than max_age_days
+    are treated as missing so the site is crawled again.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, max_age_days: float = 30):
+        """
+        Args:
+            db_path: SQLite file backing the cache
+            max_age_days: Age after which a cached website is crawled again
+        """
+        self.max_age_seconds = max_age_days * 24 * 3600
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS website_results ("
+            "domain TEXT PRIMARY KEY, email TEXT, phone TEXT, "
+            "email_source_url TEXT, phone_source_url TEXT, crawled_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, website: str) -> Optional[dict]:
+        """
+        Look up a fresh cached result for a website.
+
+        Returns:
+            dict with Email, Phone, source URLs and crawled_at, or None
+        """
+        domain = normalize_domain(website)
+        if domain is None:
+            return None
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT email, phone, email_source_url, phone_source_url, crawled_at "
+                "FROM website_results WHERE domain = ?",
+                (domain,),
+            ).fetchone()
+
+        if row is None or time.time() - row[4] > self.max_age_seconds:
+            return None
+
+        return {
+            'Email': row[0],
+            'Phone': row[1],
+            'email_source_url': row[2],
+            'phone_source_url': row[3],
+            'crawled_at': row[4],
+        }
+
+    def put(
+        self,
+        website: str,
+        email: Optional[str],
+        phone: Optional[str],
+        email_source_url: Optional[str] = None,
+        phone_source_url: Optional[str] = None,
+    ):
+        """Store the crawl result for a website, including empty results."""
+        domain = normalize_domain(website)
+        if domain is None:
+            return
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO website_results "
+                "(domain, email, phone, email_source_url, phone_source_url, crawled_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (domain, email, phone, email_source_url, phone_source_url, time.time()),
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
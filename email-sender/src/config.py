@@ -9,6 +9,21 @@ SENDGRID_API_KEY = os.getenv('SENDGRID_API_KEY')
 TEMPLATE_ID = os.getenv('TEMPLATE_ID')
 FROM_EMAIL = os.getenv('FROM_EMAIL')
 
+# Dispatch configuration
+# Point SENDGRID_API_HOST at src/mock_sendgrid.py to test without sending email
+SENDGRID_API_HOST = os.getenv('SENDGRID_API_HOST', 'https://api.sendgrid.com')
+SEND_WORKERS = int(os.getenv('SEND_WORKERS', '4'))
+SEND_RATE_PER_SECOND = float(os.getenv('SEND_RATE_PER_SECOND', '5'))
+DAILY_SEND_CAP = int(os.getenv('DAILY_SEND_CAP', '60'))  # 0 means no cap
+SEND_MAX_RETRIES = int(os.getenv('SEND_MAX_RETRIES', '4'))
+SEND_BATCH_SIZE = int(os.getenv('SEND_BATCH_SIZE', '1'))  # recipients per request, up to 1000
+
+# Send queue configuration, used by the enqueue and schedule commands
+SEND_WINDOW = os.getenv('SEND_WINDOW', '')  # local hours such as 9-17; empty means any time
+HOURLY_SEND_CAP = int(os.getenv('HOURLY_SEND_CAP', '0'))  # 0 means no cap
+SEND_QUEUE_MAX_ATTEMPTS = int(os.getenv('SEND_QUEUE_MAX_ATTEMPTS', '3'))
+SEND_QUEUE_RETRY_MINUTES = float(os.getenv('SEND_QUEUE_RETRY_MINUTES', '15'))
+
 def validate_config():
     """Validate that all required environment variables are set."""
     required_vars = ['SENDGRID_API_KEY', 'TEMPLATE_ID', 'FROM_EMAIL']
@@ -0,0 +1,360 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from sent_ledger import SentLedger, normalize_email
+
+# Statuses returned before SendGrid processed the request, so resending cannot duplicate an email
+RETRYABLE_STATUSES = {429, 503}
+
+# Statuses meaning a recipient or the request's size was invalid; splitting the batch can isolate the cause
+SPLITTABLE_STATUSES = {400, 413}
+
+# Status used when a request was sent but no response was read, e.g. on a read timeout
+UNKNOWN_OUTCOME = 0
+
+# Called from worker threads with the recipients of a finished batch and its final status
+ResultCallback = Callable[[List[str], Optional[int]], None]
+
+# SendGrid accepts at most 1000 personalizations per mail/send request
+MAX_BATCH_SIZE = 1000
+
+
+def outcome_unknown(status: Optional[int]) -> bool:
+    """
+    Whether SendGrid may have accepted a request despite not confirming it.
+
+    mail/send is not idempotent, so these requests must not be resent:
+    a read timeout, or a 5xx other than 503 answered after processing.
+    """
+    if status is None:
+        return False
+    return status == UNKNOWN_OUTCOME or (status >= 500 and status not in RETRYABLE_STATUSES)
+
+
+def batch_key(payload: dict) -> str:
+    """Everything in a payload except its personalizations; payloads with equal keys can share a request."""
+    return json.dumps({key: value for key, value in payload.items() if key != "personalizations"}, sort_keys=True)
+
+
+def merge_payloads(payloads: List[dict]) -> dict:
+    """Combine payloads with the same batch key into one request with all their personalizations."""
+    if len(payloads) == 1:
+        return payloads[0]
+    merged = dict(payloads[0])
+    merged["personalizations"] = [
+        personalization for payload in payloads for personalization in payload["personalizations"]
+    ]
+    return merged
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` sends per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_seconds = (1 - self._tokens) / self.rate
+            time.sleep(wait_seconds)
+
+
+class DailyCap:
+    """Limits sends per calendar day, counting those already in the ledger for today."""
+
+    def __init__(self, limit: int, sent_today: int = 0):
+        """
+        Args:
+            limit: Maximum sends per day; 0 means unlimited
+            sent_today: Sends already made today by earlier runs
+        """
+        self.limit = limit
+        self._used = sent_today
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """Reserve a send for today; False once the cap is reached."""
+        with self._lock:
+            if self.limit and self._used >= self.limit:
+                return False
+            self._used += 1
+            return True
+
+    def release(self):
+        """Give back a reservation for a send that did not go out."""
+        with self._lock:
+            self._used -= 1
+
+
+class DispatchStats:
+    """Per-run counters for the dispatcher."""
+
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.unknown = 0
+        self.splits = 0
+        self.request_seconds = 0.0
+        self.requests = 0
+        self.cap_reached = False
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def report(self) -> str:
+        elapsed = (self.finished or time.monotonic()) - self.started
+        throughput = self.sent / elapsed if elapsed > 0 else 0.0
+        latency = self.request_seconds / self.requests * 1000 if self.requests else 0.0
+        per_request = (self.sent + self.failed + self.unknown) / self.requests if self.requests else 0.0
+        lines = [
+            f"Sent {self.sent}, failed {self.failed}, retries {self.retries} in {elapsed:.1f}s "
+            f"({throughput:.2f} emails/s, {latency:.0f} ms average request)",
+            f"{self.requests} requests, {per_request:.1f} recipients per request, {self.splits} rejected batches split",
+        ]
+        if self.unknown:
+            lines.append(
+                f"{self.unknown} emails may or may not have been delivered and were not resent; "
+                "check the SendGrid activity feed before sending to them again"
+            )
+        if self.cap_reached:
+            lines.append("Daily send cap reached; remaining emails will go out on a later run")
+        return "\n".join(lines)
+
+
+class SendGridDispatcher:
+    """
+    Sends prepared SendGrid v3 mail/send payloads over one pooled HTTP session.
+
+    A bounded worker pool sends concurrently, a token bucket spaces out
+    requests, a daily cap stops the run once today's quota is used, and
+    429/503 responses and connection errors are retried with exponential
+    backoff, honouring Retry-After. Requests that may already have been
+    processed (read timeouts and other 5xx) are never resent, since
+    mail/send is not idempotent. Accepted sends are recorded in the sent
+    ledger as they complete.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        api_host: str = "https://api.sendgrid.com",
+        workers: int = 4,
+        rate_per_second: float = 5.0,
+        daily_cap: int = 0,
+        batch_size: int = 1,
+        max_retries: int = 4,
+        backoff_base: float = 1.0,
+        timeout: float = 30.0,
+    ):
+        """
+        Args:
+            api_key: SendGrid API key
+            api_host: Base URL of the API; point it at a local mock for testing
+            workers: Concurrent requests in flight
+            rate_per_second: Token bucket refill rate; 0 disables rate limiting
+            daily_cap: Maximum sends per day across runs; 0 means unlimited
+            batch_size: Recipients per request, as separate personalizations (max 1000)
+            max_retries: Retries per email on 429/503 or connection errors
+            backoff_base: First retry delay in seconds, doubled on each retry
+            timeout: Seconds to wait for one HTTP request
+        """
+        self.url = f"{api_host.rstrip('/')}/v3/mail/send"
+        self.workers = max(1, workers)
+        self.bucket = TokenBucket(rate_per_second)
+        self.daily_cap = daily_cap
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        self.stats = DispatchStats()
+
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def post(self, payload: dict) -> Tuple[Optional[int], int]:
+        """
+        POST one payload, retrying requests SendGrid did not process.
+
+        Only connection failures, where the request was never delivered, and
+        429/503 responses are retried. A read timeout returns UNKNOWN_OUTCOME
+        at once rather than risk sending the email twice.
+
+        Returns:
+            (final status code, UNKNOWN_OUTCOME, or None on connection failure, retries used)
+        """
+        status = None
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            started = time.monotonic()
+            retry_after = None
+            try:
+                response = self.session.post(self.url, json=payload, timeout=self.timeout)
+                status = response.status_code
+                retry_after = response.headers.get("Retry-After")
+            except requests.ConnectionError as e:
+                print(f"Could not connect to SendGrid: {str(e)}")
+                status = None
+            except requests.RequestException as e:
+                print(f"No response from SendGrid, the request may have been delivered: {str(e)}")
+                return UNKNOWN_OUTCOME, attempt
+            finally:
+                self.stats.add(requests=1, request_seconds=time.monotonic() - started)
+
+            if status is not None and status not in RETRYABLE_STATUSES:
+                return status, attempt
+            if attempt == self.max_retries:
+                break
+            time.sleep(self._backoff(attempt, retry_after))
+        return status, self.max_retries
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+        return self.backoff_base * (2 ** attempt) * (1 + random.random() * 0.25)
+
+    def _send_batch(
+        self, batch: List[Tuple[str, dict]], ledger: SentLedger, cap: DailyCap, on_result: Optional[ResultCallback] = None
+    ):
+        """
+        Send a batch as one request with a personalization per recipient.
+
+        SendGrid accepts or rejects a request as a whole, so when a batch
+        is rejected as invalid (400) or too large (413) it is split in half
+        and each half retried; this isolates the bad recipients while
+        everyone else still gets their email. Other failures, such as a bad
+        API key (401/403) or exhausted retries, fail the whole batch at
+        once, since splitting cannot help.
+        """
+        status, retries = self.post(merge_payloads([payload for _, payload in batch]))
+        self.stats.add(retries=retries)
+        if status is not None and 200 <= status < 300:
+            ledger.record_many([to_email for to_email, _ in batch], status)
+            self.stats.add(sent=len(batch))
+            if on_result:
+                on_result([to_email for to_email, _ in batch], status)
+            return
+        if outcome_unknown(status):
+            # The cap reservation is kept, since the emails may have gone out
+            for to_email, _ in batch:
+                print(f"Outcome unknown for {to_email} (status {status}); not resending")
+            self.stats.add(unknown=len(batch))
+            if on_result:
+                on_result([to_email for to_email, _ in batch], status)
+            return
+        if status in SPLITTABLE_STATUSES and len(batch) > 1:
+            middle = len(batch) // 2
+            self.stats.add(splits=1)
+            self._send_batch(batch[:middle], ledger, cap, on_result)
+            self._send_batch(batch[middle:], ledger, cap, on_result)
+            return
+        for to_email, _ in batch:
+            cap.release()
+            print(f"Failed to send email to {to_email}: status {status}")
+        self.stats.add(failed=len(batch))
+        if on_result:
+            on_result([to_email for to_email, _ in batch], status)
+
+    @staticmethod
+    def _wait_for_one(pending):
+        """Wait for a send to finish, re-raising unexpected errors such as ledger write failures."""
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            future.result()
+        return pending
+
+    def _submit(self, executor, pending, batch, ledger, cap, on_result):
+        """Submit a batch, first waiting if the maximum number of batches is in flight."""
+        if len(pending) >= self.workers * 2:
+            pending = self._wait_for_one(pending)
+        pending.add(executor.submit(self._send_batch, batch, ledger, cap, on_result))
+        return pending
+
+    def dispatch(
+        self,
+        messages: Iterable[Tuple[str, dict]],
+        ledger: SentLedger,
+        on_result: Optional[ResultCallback] = None,
+    ) -> DispatchStats:
+        """
+        Send (recipient, payload) pairs, skipping recipients already in the ledger.
+
+        Messages are consumed lazily, with at most twice the worker count of
+        batches in flight, so the input can be a generator over a large file.
+        Consecutive messages sharing a sender and template are grouped into
+        requests of up to batch_size personalizations. If given, on_result is
+        called with the final status of every batch once it is sent or fails.
+        """
+        self.stats = DispatchStats()
+        today = datetime.now().astimezone().replace(hour=0, minute=0, second=0, microsecond=0)
+        cap = DailyCap(self.daily_cap, ledger.sent_since(today) if self.daily_cap else 0)
+
+        pending = set()
+        queued = set()
+        batch: List[Tuple[str, dict]] = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for to_email, payload in messages:
+                if to_email in ledger or normalize_email(to_email) in queued:
+                    print(f"Email already sent to {to_email}, skipping...")
+                    continue
+                while not cap.try_acquire():
+                    if batch:
+                        # Send what we have; its failures may free up slots
+                        pending = self._submit(executor, pending, batch, ledger, cap, on_result)
+                        batch = []
+                    elif not pending:
+                        self.stats.cap_reached = True
+                        break
+                    else:
+                        # Failed sends give their reservation back; wait to see if one frees up
+                        pending = self._wait_for_one(pending)
+                if self.stats.cap_reached:
+                    break
+                if batch and batch_key(payload) != batch_key(batch[0][1]):
+                    pending = self._submit(executor, pending, batch, ledger, cap, on_result)
+                    batch = []
+                queued.add(normalize_email(to_email))
+                batch.append((to_email, payload))
+                if len(batch) >= self.batch_size:
+                    pending = self._submit(executor, pending, batch, ledger, cap, on_result)
+                    batch = []
+            if batch:
+                pending = self._submit(executor, pending, batch, ledger, cap, on_result)
+            for future in pending:
+                future.result()
+
+        self.stats.finished = time.monotonic()
+        return self.stats
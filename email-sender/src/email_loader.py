@@ -0,0 +1,155 @@
+import json
+from typing import Iterator, Optional, TextIO
+
+REQUIRED_FIELDS = ('company_email', 'subject_line', 'email_body', 'company_name')
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+def validate_email_record(record) -> Optional[str]:
+    """Return why a personalized email record is unusable, or None if it is valid."""
+    if not isinstance(record, dict):
+        return "not an object"
+    for field in REQUIRED_FIELDS:
+        value = record.get(field)
+        if not isinstance(value, str) or not value.strip():
+            return f"missing {field}"
+    if '@' not in record['company_email']:
+        return "invalid company_email"
+    return None
+
+
+class _JsonStream:
+    """Reads JSON values one at a time from a file without loading all of it."""
+
+    def __init__(self, file: TextIO, chunk_size: int):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _read_more(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop what has been consumed so memory stays bounded by one item
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, or '' at end of file."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read_more():
+                return ''
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expected '{char}'", self.buffer, self.pos)
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value, reading more of the file as needed."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._read_more()
+
+    def array_items(self) -> Iterator:
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect(']')
+            return
+
+
+class PersonalizedEmailLoader:
+    """
+    Streams personalized email records from a JSON or JSON Lines file.
+
+    A .json file is parsed incrementally: only the current item of its
+    "emails" array is held in memory. Records are validated as they are
+    read; invalid ones are skipped and only counted.
+    """
+
+    def __init__(self, file_path: str, chunk_size: int = 64 * 1024):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.loaded = 0
+        self.invalid = 0
+        self.unreadable = 0
+
+    def __iter__(self) -> Iterator[dict]:
+        records = self._iter_jsonl() if self.file_path.endswith('.jsonl') else self._iter_json()
+        for record in records:
+            if validate_email_record(record) is not None:
+                self.invalid += 1
+                continue
+            self.loaded += 1
+            yield record
+        print(self.summary())
+
+    def summary(self) -> str:
+        text = f"Read {self.loaded} emails from {self.file_path}"
+        if self.invalid or self.unreadable:
+            text += f" ({self.invalid} invalid and {self.unreadable} unreadable records skipped)"
+        return text
+
+    def _iter_jsonl(self) -> Iterator:
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # e.g. a partial last line still being written by the generator
+                    self.unreadable += 1
+
+    def _iter_json(self) -> Iterator:
+        """Yield the items of the top-level "emails" array, or of a top-level array."""
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            stream = _JsonStream(f, self.chunk_size)
+            if stream.peek() == '[':
+                yield from stream.array_items()
+                return
+
+            stream.expect('{')
+            if stream.peek() == '}':
+                return
+            while True:
+                key = stream.value()
+                stream.expect(':')
+                if key == 'emails':
+                    yield from stream.array_items()
+                else:
+                    stream.value()
+                if stream.peek() == ',':
+                    stream.pos += 1
+                    continue
+                stream.expect('}')
+                return
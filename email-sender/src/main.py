@@ -1,61 +1,62 @@
-import json
+import argparse
 import os
+import sys
+from typing import Iterator
 import pandas as pd
-import sendgrid
 from sendgrid.helpers.mail import Mail
-from config import SENDGRID_API_KEY, TEMPLATE_ID, FROM_EMAIL, validate_config
+from config import (
+    SENDGRID_API_KEY, TEMPLATE_ID, FROM_EMAIL, SENDGRID_API_HOST, SEND_WORKERS,
+    SEND_RATE_PER_SECOND, DAILY_SEND_CAP, SEND_MAX_RETRIES, SEND_BATCH_SIZE, SEND_WINDOW, HOURLY_SEND_CAP,
+    SEND_QUEUE_MAX_ATTEMPTS, SEND_QUEUE_RETRY_MINUTES, validate_config,
+)
+from dispatcher import SendGridDispatcher
+from email_loader import PersonalizedEmailLoader
+from send_queue import SendQueue, SendSchedule, run_scheduler
+from sent_ledger import SentLedger
+
+COMMANDS = ('send', 'enqueue', 'schedule', 'status')
 
 def get_sent_emails_file() -> str:
-    """Get the path to the sent emails tracking file."""
-    sent_emails_dir = "sent-emails"
-    if not os.path.exists(sent_emails_dir):
-        os.makedirs(sent_emails_dir)
-    return os.path.join(sent_emails_dir, f"{FROM_EMAIL.replace('@', '_')}.json")
-
-def load_sent_emails() -> set:
-    """Load the set of already sent email addresses."""
-    sent_emails_file = get_sent_emails_file()
-    if os.path.exists(sent_emails_file):
-        try:
-            with open(sent_emails_file, 'r') as f:
-                return set(json.load(f))
-        except json.JSONDecodeError:
-            return set()
-    return set()
-
-def save_sent_email(email: str):
-    """Save a sent email address to the tracking file."""
-    sent_emails = load_sent_emails()
-    sent_emails.add(email)
-    sent_emails_file = get_sent_emails_file()
-    with open(sent_emails_file, 'w') as f:
-        json.dump(list(sent_emails), f)
-
-def load_personalized_data(file_path: str) -> list:
-    """Load personalized email data from a JSON file."""
-    try:
-        with open(file_path, 'r') as f:
-            print(f"Loading data from {file_path}")
-            data = json.load(f)
-            print(f"Successfully loaded data: {data}")
-            return data['emails']
-    except json.JSONDecodeError as e:
-        print(f"JSON parsing error: {str(e)}")
-        raise
-    except Exception as e:
-        print(f"Error loading file {file_path}: {str(e)}")
-        raise
+    """Get the path to the sent emails ledger."""
+    return os.path.join("sent-emails", f"{FROM_EMAIL.replace('@', '_')}.jsonl")
+
+def get_send_queue_file() -> str:
+    """Get the path to the persistent send queue."""
+    return os.path.join("send-queue", f"{FROM_EMAIL.replace('@', '_')}.sqlite")
+
+def open_send_queue() -> SendQueue:
+    return SendQueue(
+        get_send_queue_file(),
+        max_attempts=SEND_QUEUE_MAX_ATTEMPTS,
+        retry_delay=SEND_QUEUE_RETRY_MINUTES * 60,
+    )
+
+def build_dispatcher(daily_cap: int) -> SendGridDispatcher:
+    return SendGridDispatcher(
+        SENDGRID_API_KEY,
+        api_host=SENDGRID_API_HOST,
+        workers=SEND_WORKERS,
+        rate_per_second=SEND_RATE_PER_SECOND,
+        daily_cap=daily_cap,
+        batch_size=SEND_BATCH_SIZE,
+        max_retries=SEND_MAX_RETRIES,
+    )
+
+def load_personalized_data(file_path: str) -> PersonalizedEmailLoader:
+    """Stream personalized email data from a JSON or JSON Lines file, validating each record."""
+    print(f"Streaming data from {file_path}")
+    return PersonalizedEmailLoader(file_path)
 
-def send_email(to_email: str, dynamic_template_data: dict) -> bool:
+def build_payload(to_email: str, dynamic_template_data: dict) -> dict:
     """
-    Send a personalized email using SendGrid template.
+    Build the SendGrid v3 mail/send payload for one personalized email.
     
     Args:
         to_email: Recipient's email address
         dynamic_template_data: Dictionary containing template variables
     
     Returns:
-        bool: True if email was sent successfully, False otherwise
+        dict: JSON body for the mail/send request
     """
     message = Mail(
         from_email=FROM_EMAIL,
@@ -67,37 +68,82 @@ def send_email(to_email: str, dynamic_template_data: dict) -> bool:
         'email_body': dynamic_template_data['email_body'],
         'company_name': dynamic_template_data['company_name'],
     }
+    return message.get()
 
-    try:
-        sg = sendgrid.SendGridAPIClient(SENDGRID_API_KEY)
-        response = sg.send(message)
-        if response.status_code == 202:
-            save_sent_email(to_email)
-        return response.status_code
+def iter_messages(data) -> Iterator[tuple]:
+    """Yield (recipient, payload) pairs for the dispatcher."""
+    for item in data:
+        to_email = item.pop('company_email')  # Remove email from template data
+        yield to_email, build_payload(to_email, item)
 
-    except Exception as e:
-        print(str(e))
-        return str(e)
+def send(data_file: str):
+    """Send a file of personalized emails in one run."""
+    # Stream personalized data; only the emails in flight are held in memory
+    data = load_personalized_data(data_file)
+    sent_emails = SentLedger(get_sent_emails_file())
+
+    # Send emails only to new recipients, over one pooled connection
+    dispatcher = build_dispatcher(DAILY_SEND_CAP)
+    stats = dispatcher.dispatch(iter_messages(data), sent_emails)
+    print(stats.report())
+
+def enqueue(data_file: str):
+    """Validate a file of personalized emails once and add them to the send queue."""
+    data = load_personalized_data(data_file)
+    sent_emails = SentLedger(get_sent_emails_file())
+    queue = open_send_queue()
+    added, skipped = queue.enqueue(iter_messages(data), sent_emails)
+    print(f"Queued {added} emails, skipped {skipped} already sent or queued")
+    print(queue.report())
+    queue.close()
+
+def schedule(once: bool):
+    """Drain the send queue within the configured send window and caps."""
+    sent_emails = SentLedger(get_sent_emails_file())
+    queue = open_send_queue()
+    send_schedule = SendSchedule(SEND_WINDOW, hourly_cap=HOURLY_SEND_CAP, daily_cap=DAILY_SEND_CAP)
+    # The schedule enforces the daily cap, so the dispatcher only sends what it is given
+    run_scheduler(queue, send_schedule, build_dispatcher(0), sent_emails, once=once)
+    queue.close()
+
+def status():
+    """Print how many queued emails are in each state."""
+    queue = open_send_queue()
+    print(queue.report())
+    queue.close()
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Send personalized emails with SendGrid")
+    subparsers = parser.add_subparsers(dest='command')
+    send_parser = subparsers.add_parser('send', help="Send a file of emails now (the default)")
+    send_parser.add_argument('data_file', nargs='?', default='personalized_email.json')
+    enqueue_parser = subparsers.add_parser('enqueue', help="Add a file of emails to the send queue")
+    enqueue_parser.add_argument('data_file', nargs='?', default='personalized_email.json')
+    schedule_parser = subparsers.add_parser('schedule', help="Drain the send queue within the send window and caps")
+    schedule_parser.add_argument('--once', action='store_true', help="Send what is allowed now, then exit")
+    subparsers.add_parser('status', help="Show queued emails by state")
+
+    # Keep `python src/main.py [file]` working as a one-shot send
+    if not argv or argv[0] not in COMMANDS and argv[0] not in ('-h', '--help'):
+        argv = ['send'] + list(argv)
+    return parser.parse_args(argv)
 
 def main():
     """Main function to send personalized emails."""
+    args = parse_args(sys.argv[1:])
+
     # Validate environment variables
     validate_config()
     
     try:
-        # Load personalized data
-        data = load_personalized_data('personalized_email.json')
-        sent_emails = load_sent_emails()
-        
-        # Send emails only to new recipients
-        for item in data:
-            to_email = item.pop('company_email')  # Remove email from template data
-            if to_email not in sent_emails:
-                success = send_email(to_email, item)
-                if not success:
-                    print(f"Failed to send email to {to_email}")
-            else:
-                print(f"Email already sent to {to_email}, skipping...")
+        if args.command == 'enqueue':
+            enqueue(args.data_file)
+        elif args.command == 'schedule':
+            schedule(args.once)
+        elif args.command == 'status':
+            status()
+        else:
+            send(args.data_file)
     
     except Exception as e:
         print(f"An error occurred: {str(e)}")
@@ -0,0 +1,96 @@
+"""
+Local stand-in for the SendGrid v3 mail/send endpoint.
+
+Run it and point SENDGRID_API_HOST at it to exercise the dispatcher
+without sending real email:
+
+    python src/mock_sendgrid.py --port 8025 --throttle-rate 0.1 --error-rate 0.05
+    SENDGRID_API_HOST=http://localhost:8025 python src/main.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockSendGridHandler(BaseHTTPRequestHandler):
+    accepted = 0
+    recipients = 0
+    lock = threading.Lock()
+    throttle_rate = 0.0
+    error_rate = 0.0
+    latency = 0.0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path != "/v3/mail/send":
+            self._respond(404, {"errors": [{"message": "not found"}]})
+            return
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            self._respond(401, {"errors": [{"message": "authorization required"}]})
+            return
+        try:
+            payload = json.loads(body)
+            personalizations = payload["personalizations"]
+        except (json.JSONDecodeError, KeyError, TypeError):
+            self._respond(400, {"errors": [{"message": "invalid payload"}]})
+            return
+
+        # Like SendGrid, reject the whole request if any recipient is invalid
+        for index, personalization in enumerate(personalizations):
+            for recipient in personalization.get("to", []):
+                if "@" not in recipient.get("email", ""):
+                    self._respond(400, {"errors": [{"field": f"personalizations.{index}.to", "message": "invalid email"}]})
+                    return
+
+        time.sleep(self.latency)
+        roll = random.random()
+        if roll < self.throttle_rate:
+            self._respond(429, {"errors": [{"message": "too many requests"}]}, {"Retry-After": "1"})
+            return
+        if roll < self.throttle_rate + self.error_rate:
+            self._respond(503, {"errors": [{"message": "service unavailable"}]})
+            return
+
+        with self.lock:
+            MockSendGridHandler.accepted += 1
+            MockSendGridHandler.recipients += len(personalizations)
+            print(f"Accepted request {MockSendGridHandler.accepted} ({MockSendGridHandler.recipients} recipients total)")
+        self._respond(202)
+
+    def _respond(self, status, body=None, headers=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock SendGrid mail/send endpoint")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds to wait before answering")
+    args = parser.parse_args()
+
+    MockSendGridHandler.throttle_rate = args.throttle_rate
+    MockSendGridHandler.error_rate = args.error_rate
+    MockSendGridHandler.latency = args.latency
+    server = ThreadingHTTPServer(("localhost", args.port), MockSendGridHandler)
+    print(f"Mock SendGrid listening on http://localhost:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dispatcher import RETRYABLE_STATUSES, SendGridDispatcher
+from sent_ledger import SentLedger, normalize_email
+
+PENDING = "pending"
+RETRYING = "retrying"
+SENT = "sent"
+FAILED = "failed"
+STATES = (PENDING, RETRYING, SENT, FAILED)
+
+
+class SendQueue:
+    """
+    Persistent queue of prepared SendGrid payloads in SQLite.
+
+    Emails are validated and rendered into payloads once, when enqueued;
+    the scheduler only reads payloads back, so a campaign spread over many
+    days never re-reads its input file. Each message is pending, sent,
+    failed, or retrying after a transient failure, and messages are
+    drained in the order they were enqueued.
+
+    The sent ledger stays the source of truth for what was delivered: it
+    is written before the queue, and messages found in it are marked sent
+    instead of being sent again, so a crash between the two is harmless.
+    One scheduler should drain a queue at a time.
+    """
+
+    def __init__(self, db_path: str, max_attempts: int = 3, retry_delay: float = 900.0):
+        """
+        Args:
+            db_path: SQLite file backing the queue
+            max_attempts: Scheduler runs that may try a message before it is marked failed
+            retry_delay: Seconds before the first retry, doubled after each further failure
+        """
+        self.db_path = db_path
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "id INTEGER PRIMARY KEY, email TEXT NOT NULL UNIQUE, to_email TEXT NOT NULL, payload TEXT NOT NULL, "
+            "state TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, last_status INTEGER, "
+            "next_attempt_at REAL NOT NULL, enqueued_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS messages_due ON messages (state, next_attempt_at)")
+        self._conn.commit()
+
+    def enqueue(
+        self, messages: Iterable[Tuple[str, dict]], ledger: SentLedger, commit_every: int = 500
+    ) -> Tuple[int, int]:
+        """
+        Add (recipient, payload) pairs, skipping recipients already sent or queued.
+
+        Returns:
+            (messages added, messages skipped)
+        """
+        added = skipped = 0
+        rows = []
+        for to_email, payload in messages:
+            if to_email in ledger:
+                skipped += 1
+                continue
+            now = time.time()
+            rows.append((normalize_email(to_email), to_email, json.dumps(payload), PENDING, now, now, now))
+            if len(rows) >= commit_every:
+                count = self._insert(rows)
+                added += count
+                skipped += len(rows) - count
+                rows = []
+        if rows:
+            count = self._insert(rows)
+            added += count
+            skipped += len(rows) - count
+        return added, skipped
+
+    def _insert(self, rows) -> int:
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO messages "
+                "(email, to_email, payload, state, next_attempt_at, enqueued_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            return self._conn.total_changes - before
+
+    def due(self, limit: int, now: Optional[float] = None) -> List[Tuple[str, dict]]:
+        """Return up to `limit` pending or retrying messages whose next attempt is due, oldest first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT to_email, payload FROM messages WHERE state IN (?, ?) AND next_attempt_at <= ? "
+                "ORDER BY id LIMIT ?",
+                (PENDING, RETRYING, now, limit),
+            ).fetchall()
+        return [(to_email, json.loads(payload)) for to_email, payload in rows]
+
+    def record_result(self, emails: List[str], status: Optional[int]):
+        """
+        Update messages after a send attempt; used as the dispatcher's result callback.
+
+        Accepted messages become sent. Rejected ones (4xx) become failed at
+        once, as do those SendGrid may have accepted without confirming (read
+        timeouts, 5xx other than 503), so they are never sent twice. Throttled,
+        503 and connection failures are retried with backoff until
+        max_attempts is used up.
+        """
+        now = time.time()
+        keys = [normalize_email(email) for email in emails]
+        with self._lock:
+            if status is not None and 200 <= status < 300:
+                self._conn.executemany(
+                    "UPDATE messages SET state = ?, attempts = attempts + 1, last_status = ?, updated_at = ? "
+                    "WHERE email = ?",
+                    [(SENT, status, now, key) for key in keys],
+                )
+            else:
+                transient = status is None or status in RETRYABLE_STATUSES
+                for key in keys:
+                    row = self._conn.execute("SELECT attempts FROM messages WHERE email = ?", (key,)).fetchone()
+                    if row is None:
+                        continue
+                    attempts = row[0] + 1
+                    state = RETRYING if transient and attempts < self.max_attempts else FAILED
+                    next_attempt_at = now + self.retry_delay * (2 ** (attempts - 1))
+                    self._conn.execute(
+                        "UPDATE messages SET state = ?, attempts = ?, last_status = ?, next_attempt_at = ?, "
+                        "updated_at = ? WHERE email = ?",
+                        (state, attempts, status, next_attempt_at, now, key),
+                    )
+            self._conn.commit()
+
+    def mark_sent(self, emails: List[str]):
+        """Mark messages found in the sent ledger as sent without sending them."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE messages SET state = ?, updated_at = ? WHERE email = ?",
+                [(SENT, now, normalize_email(email)) for email in emails],
+            )
+            self._conn.commit()
+
+    def counts(self) -> Dict[str, int]:
+        """Number of messages in each state."""
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM messages GROUP BY state").fetchall()
+        counts = {state: 0 for state in STATES}
+        counts.update(dict(rows))
+        return counts
+
+    def outstanding(self) -> int:
+        """Messages that still have to be sent or retried."""
+        counts = self.counts()
+        return counts[PENDING] + counts[RETRYING]
+
+    def next_retry_at(self) -> Optional[float]:
+        """When the earliest not-yet-due message becomes due, or None if nothing is waiting."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_attempt_at) FROM messages WHERE state IN (?, ?)", (PENDING, RETRYING)
+            ).fetchone()
+        return row[0]
+
+    def report(self) -> str:
+        counts = self.counts()
+        return f"{self.db_path}: " + ", ".join(f"{counts[state]} {state}" for state in STATES)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def parse_window(window: str) -> Optional[Tuple[int, int]]:
+    """Parse a "start-end" range of local hours such as "9-17" or "22-6"; empty means any time."""
+    if not window or not window.strip():
+        return None
+    try:
+        start, end = (int(part) for part in window.split("-"))
+    except ValueError:
+        raise ValueError(f"Invalid send window {window!r}, expected hours like 9-17")
+    if not (0 <= start <= 23 and 0 <= end <= 24):
+        raise ValueError(f"Invalid send window {window!r}, hours must be between 0 and 24")
+    return start, end % 24
+
+
+class SendSchedule:
+    """Local-time sending window plus hourly and daily caps, counted from the sent ledger."""
+
+    def __init__(self, window: str = "", hourly_cap: int = 0, daily_cap: int = 0):
+        """
+        Args:
+            window: Hours during which sending is allowed, e.g. "9-17"; empty means any time
+            hourly_cap: Maximum sends per clock hour; 0 means unlimited
+            daily_cap: Maximum sends per day; 0 means unlimited
+        """
+        self.window = parse_window(window)
+        self.hourly_cap = hourly_cap
+        self.daily_cap = daily_cap
+
+    def in_window(self, now: datetime) -> bool:
+        if self.window is None:
+            return True
+        start, end = self.window
+        if start == end:
+            return True
+        if start < end:
+            return start <= now.hour < end
+        # The window spans midnight
+        return now.hour >= start or now.hour < end
+
+    def seconds_until_open(self, now: datetime) -> float:
+        start, _ = self.window
+        opens = now.replace(hour=start, minute=0, second=0, microsecond=0)
+        if opens <= now:
+            opens += timedelta(days=1)
+        return (opens - now).total_seconds()
+
+    def allowance(self, ledger: SentLedger, now: datetime) -> Optional[int]:
+        """Sends still allowed this hour and day, or None if neither is capped."""
+        remaining = []
+        if self.hourly_cap:
+            hour_start = now.replace(minute=0, second=0, microsecond=0)
+            remaining.append(self.hourly_cap - ledger.sent_since(hour_start))
+        if self.daily_cap:
+            day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            remaining.append(self.daily_cap - ledger.sent_since(day_start))
+        return max(0, min(remaining)) if remaining else None
+
+    def seconds_until_allowance(self, ledger: SentLedger, now: datetime) -> float:
+        """How long to wait once a cap is used up: until tomorrow for the daily cap, else the next hour."""
+        day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        if self.daily_cap and ledger.sent_since(day_start) >= self.daily_cap:
+            return (day_start + timedelta(days=1) - now).total_seconds()
+        hour_start = now.replace(minute=0, second=0, microsecond=0)
+        return (hour_start + timedelta(hours=1) - now).total_seconds()
+
+
+def run_scheduler(
+    queue: SendQueue,
+    schedule: SendSchedule,
+    dispatcher: SendGridDispatcher,
+    ledger: SentLedger,
+    once: bool = False,
+    chunk_size: int = 500,
+    poll_seconds: float = 300.0,
+):
+    """
+    Drain the queue in chunks within the schedule's window and caps.
+
+    Keeps running, sleeping until the window opens, a cap resets or a retry
+    is due, until no pending or retrying messages are left. With once=True
+    it sends whatever is allowed right now and returns.
+    """
+    while True:
+        now = datetime.now().astimezone()
+        wait_seconds = None
+        if not schedule.in_window(now):
+            wait_seconds = schedule.seconds_until_open(now)
+            reason = "outside the send window"
+        else:
+            allowance = schedule.allowance(ledger, now)
+            if allowance == 0:
+                wait_seconds = schedule.seconds_until_allowance(ledger, now)
+                reason = "send cap reached"
+            else:
+                messages = queue.due(chunk_size if allowance is None else min(chunk_size, allowance))
+                already_sent = [to_email for to_email, _ in messages if to_email in ledger]
+                if already_sent:
+                    queue.mark_sent(already_sent)
+                messages = [(to_email, payload) for to_email, payload in messages if to_email not in ledger]
+                if messages:
+                    stats = dispatcher.dispatch(messages, ledger, queue.record_result)
+                    print(stats.report())
+                    print(queue.report())
+                    continue
+                if queue.outstanding() == 0:
+                    print(f"Queue drained: {queue.report()}")
+                    return
+                next_retry_at = queue.next_retry_at()
+                wait_seconds = min(poll_seconds, max(1.0, next_retry_at - time.time()))
+                reason = "waiting for retries"
+
+        if once:
+            print(f"Stopping: {reason}. {queue.report()}")
+            return
+        print(f"Sleeping {wait_seconds / 60:.1f} minutes: {reason}")
+        time.sleep(wait_seconds)
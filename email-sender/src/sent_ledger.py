@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+class SentLedger:
+    """
+    Append-only record of sent emails, one JSON line per accepted send.
+
+    The ledger is read into memory once; each send appends a single line
+    with the timestamp and SendGrid status and fsyncs it, so recording a
+    send costs O(1) and a crash can at most tear the last line, which is
+    dropped on the next load. When duplicate lines pile up the file is
+    compacted by atomically replacing it with one line per address.
+    """
+
+    def __init__(self, path: str, compact_ratio: float = 2.0):
+        """
+        Args:
+            path: JSON Lines ledger file
+            compact_ratio: Compact on load once lines exceed this many per unique address
+        """
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self._sent: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        ledger_dir = os.path.dirname(path)
+        if ledger_dir:
+            os.makedirs(ledger_dir, exist_ok=True)
+        self._migrate_legacy_json()
+        self._load()
+
+    def __contains__(self, email: str) -> bool:
+        with self._lock:
+            return normalize_email(email) in self._sent
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sent)
+
+    def sent_since(self, since: datetime) -> int:
+        """Count sends recorded at or after a timezone-aware datetime."""
+        with self._lock:
+            entries = list(self._sent.values())
+        count = 0
+        for entry in entries:
+            if entry.get("sent_at") and datetime.fromisoformat(entry["sent_at"]) >= since:
+                count += 1
+        return count
+
+    def record(self, email: str, status):
+        """Durably record an accepted send."""
+        self.record_many([email], status)
+
+    def record_many(self, emails: List[str], status):
+        """Durably record several sends accepted by one request, with a single fsync."""
+        sent_at = datetime.now(timezone.utc).isoformat()
+        entries = [{"email": normalize_email(email), "sent_at": sent_at, "status": status} for email in emails]
+        data = "".join(json.dumps(entry) + "\n" for entry in entries)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            for entry in entries:
+                self._sent[entry["email"]] = entry
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                # A crash tore the last line; drop it so appends start on a fresh line
+                f.truncate(data.rfind(b"\n") + 1)
+                print(f"Discarded a partially written entry at the end of {self.path}")
+
+        lines = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                lines += 1
+                try:
+                    entry = json.loads(line)
+                    self._sent[normalize_email(entry["email"])] = entry
+                except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+                    print(f"Ignoring unreadable line {line_number} in {self.path}")
+
+        print(f"Loaded {len(self._sent)} sent emails from {self.path}")
+        if self._sent and lines > self.compact_ratio * len(self._sent):
+            self.compact()
+
+    def compact(self):
+        """Rewrite the ledger with one line per address, atomically replacing the file."""
+        temp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                for entry in self._sent.values():
+                    f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        print(f"Compacted {self.path} to {len(self._sent)} entries")
+
+    def _migrate_legacy_json(self):
+        """Import the old <from>.json list of addresses the first time the ledger is opened."""
+        legacy_path = f"{os.path.splitext(self.path)[0]}.json"
+        if os.path.exists(self.path) or not os.path.exists(legacy_path):
+            return
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            # A corrupt legacy file must stop the run rather than look like "nothing sent"
+            addresses = json.load(f)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for email in addresses:
+                f.write(json.dumps({"email": normalize_email(email), "sent_at": None, "status": None}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        print(f"Migrated {len(addresses)} sent emails from {legacy_path} to {self.path}")
@@ -1,15 +1,18 @@
+from copy import deepcopy
 from enum import Enum
-from crewai_tools import SerperDevTool, ScrapeWebsiteTool
+from functools import lru_cache
 from pydantic import BaseModel, validator
 from typing import List, Optional
 import re
-import os
+import yaml
 from dotenv import load_dotenv
 load_dotenv()
 
 from crewai import Agent, Crew, Process, Task, LLM
 from crewai.project import CrewBase, agent, crew, task
-from src.llm_providers import LLMProvider, initialize_llm
+from src.llm_providers import initialize_active_llm
+from src.metrics import get_metrics
+from src.research_cache import CachedSerperDevTool, CachedScrapeWebsiteTool
 
 class PersonalizedEmail(BaseModel):
     company_email: str
@@ -76,17 +79,80 @@ class PersonalizedEmail(BaseModel):
 class EmailOutput(BaseModel):
     emails: List[PersonalizedEmail]
 
+@lru_cache(maxsize=None)
+def _parse_yaml(config_path: str) -> dict:
+    with open(config_path, "r", encoding="utf-8") as file:
+        return yaml.safe_load(file)
+
+
+def load_yaml_once(config_path) -> dict:
+    """Parse a config file once per process; each crew gets its own copy to mutate."""
+    return deepcopy(_parse_yaml(str(config_path)))
+
+
+def create_researcher(config: dict, llm: LLM) -> Agent:
+    """Build the researcher agent with cached search and website tools."""
+    # Searches and page reads are cached on disk and shared across crews
+    serper_tool = CachedSerperDevTool()
+    scrape_website_tool = CachedScrapeWebsiteTool()
+    
+    return Agent(
+        config=config,
+        tools=[serper_tool, scrape_website_tool],
+        allow_delegation=False,
+        verbose=True,
+        llm=llm
+    )
+
+
+@CrewBase
+class IndustryResearchCrew:
+    """Researches the pain points of one industry/category/subcategory, shared by all its targets"""
+
+    def __init__(self, llm: Optional[LLM] = None):
+        self.agents_config = "config/agents.yaml"
+        self.tasks_config = "config/tasks.yaml"
+        self.llm = llm or initialize_active_llm()
+
+    @agent
+    def researcher(self) -> Agent:
+        return create_researcher(self.agents_config["researcher"], self.llm)
+
+    @task
+    def research_industry_needs(self) -> Task:
+        return Task(
+            config=self.tasks_config["research_industry_needs"],
+            agent=self.researcher(),
+            llm=self.llm,
+        )
+
+    @crew
+    def crew(self) -> Crew:
+        """Creates the IndustryResearch crew"""
+        return Crew(
+            agents=self.agents,
+            tasks=self.tasks,
+            process=Process.sequential,
+            task_callback=get_metrics().task_finished,
+            verbose=True,
+        )
+
+
 @CrewBase
 class MarketingEmailGeneratorCrew:
-    """MarketingEmailGenerator crew"""
+    """MarketingEmailGenerator crew
 
-    def __init__(self):
+    Industry research is not part of this crew: IndustryResearchCrew runs it
+    once per industry and the result is passed in as the industry_research input.
+    """
+
+    def __init__(self, llm: Optional[LLM] = None):
+        """
+        Args:
+            llm: LLM shared with other crews; initialized from ACTIVE_LLM if omitted
+        """
         self.agents_config = "config/agents.yaml"
         self.tasks_config = "config/tasks.yaml"
-        output_dir = "output"
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-        self.output_file = os.path.join(output_dir, "personalized_email.json")
         
         # Add JSON encoding configuration
         self.json_config = {
@@ -101,30 +167,11 @@ class MarketingEmailGeneratorCrew:
         #     allow_delegation=True,
         # )
 
-        active_llm = os.getenv("ACTIVE_LLM", "").upper()
-        print(f"Active LLM: {active_llm}")
-        try:
-            provider = LLMProvider(active_llm)
-        except ValueError:
-            raise ValueError(
-                f"Invalid LLM provider: {active_llm}. "
-                f"Must be one of: {', '.join([p.value for p in LLMProvider])}"
-            )
-        
-        self.llm = initialize_llm(provider)
+        self.llm = llm or initialize_active_llm()
 
     @agent
     def researcher(self) -> Agent:
-        serper_tool = SerperDevTool()
-        scrape_website_tool = ScrapeWebsiteTool()
-        
-        return Agent(
-            config=self.agents_config["researcher"],
-            tools=[serper_tool, scrape_website_tool],
-            allow_delegation=False,
-            verbose=True,
-            llm=self.llm
-        )
+        return create_researcher(self.agents_config["researcher"], self.llm)
 
     @agent
     def sales_manager(self) -> Agent:
@@ -142,7 +189,6 @@ class MarketingEmailGeneratorCrew:
             allow_delegation=False,
             verbose=True,
             llm=self.llm,
-            output_file=self.output_file,
         )
 
     @task
@@ -153,24 +199,14 @@ class MarketingEmailGeneratorCrew:
             llm=self.llm,
         )
 
-    @task
-    def research_industry_needs(self) -> Task:
-        return Task(
-            config=self.tasks_config["research_industry_needs"],
-            agent=self.researcher(),
-            llm=self.llm,
-        )
-
     @task
     def write_sales_email(self) -> Task:
         initial_company_research = self.initial_company_research()
-        research_industry_needs = self.research_industry_needs()
         return Task(
             config=self.tasks_config["write_sales_email"],
-            context=[initial_company_research, research_industry_needs],
+            context=[initial_company_research],
             agent=self.email_copywriter(),
             output_json=EmailOutput,
-            output_file=self.output_file,
             llm=self.llm,
             format_kwargs={
                 'ensure_ascii': False,
@@ -190,5 +226,12 @@ class MarketingEmailGeneratorCrew:
             tasks=self.tasks,
             manager_llm=self.llm,
             process=Process.sequential, # or Process.hierarchical
+            task_callback=get_metrics().task_finished,
             verbose=True,
-        )
\ No newline at end of file
+        )
+
+
+# CrewBase re-reads the agent and task YAML for every crew instance; parse
+# them once so concurrent crews only copy the already-parsed configs
+for crew_class in (IndustryResearchCrew, MarketingEmailGeneratorCrew):
+    crew_class.load_yaml = staticmethod(load_yaml_once)
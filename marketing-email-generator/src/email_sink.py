@@ -0,0 +1,63 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List
+
+DEFAULT_OUTPUT_PATH = os.path.join("output", "personalized_emails.jsonl")
+
+
+def emails_from_output(crew_output: Any) -> List[Dict[str, Any]]:
+    """Extract the PersonalizedEmail dicts from a crew's EmailOutput result."""
+    data = getattr(crew_output, "json_dict", None)
+    if not data:
+        pydantic_output = getattr(crew_output, "pydantic", None)
+        if pydantic_output is not None:
+            data = pydantic_output.dict()
+        else:
+            data = json.loads(crew_output.raw)
+    return list(data.get("emails", []))
+
+
+class JsonlEmailSink:
+    """
+    Append-only JSON Lines file with one PersonalizedEmail per line.
+
+    Each target's emails are written with a single append and fsync'd, so
+    concurrent crews never interleave partial lines. A crash can only leave
+    an incomplete last line; readers skip it and the next run truncates it.
+    """
+
+    def __init__(self, path: str = DEFAULT_OUTPUT_PATH):
+        """
+        Args:
+            path: JSON Lines file emails are appended to
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        output_dir = os.path.dirname(path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        self._truncate_torn_tail()
+
+    def _truncate_torn_tail(self):
+        """Cut off a partial last line left by a crash so new emails start on a fresh line."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+                print(f"Discarded a partially written email at the end of {self.path}")
+
+    def append(self, emails: List[Dict[str, Any]]):
+        """Durably append the emails generated for one target."""
+        if not emails:
+            return
+        data = "".join(json.dumps(email, ensure_ascii=False) + "\n" for email in emails).encode("utf-8")
+        with self._lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, data)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
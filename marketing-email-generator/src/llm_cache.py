@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+DEFAULT_DB_PATH = os.path.join("cache", "llm_responses.sqlite")
+DEFAULT_MAX_MB = 200
+
+# Rough characters-per-token ratio used to estimate tokens saved by cache hits
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+class LLMResponseCache:
+    """
+    SQLite cache of LLM completions keyed by provider, model, temperature and prompt.
+
+    The key hashes the full message list, so any change to a prompt or to
+    upstream task output misses the cache while unchanged calls are answered
+    locally. When the stored responses exceed max_bytes, the least recently
+    used entries are evicted.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024):
+        """
+        Args:
+            db_path: SQLite file backing the cache
+            max_bytes: Total size of stored responses kept before eviction
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+            "estimated_tokens INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(provider: str, model: str, temperature: Optional[float], messages: List[dict]) -> str:
+        """Build a deterministic key for one completion request."""
+        prompt_hash = hashlib.sha256(
+            json.dumps(messages, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+        ).hexdigest()
+        return f"{provider}|{model}|{temperature}|{prompt_hash}"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, counting the hit or miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, estimated_tokens FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.tokens_saved += row[1]
+            self._conn.execute("UPDATE llm_responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key: str, messages: List[dict], response: str):
+        """Store a response, then evict old entries if the cache is over its size limit."""
+        prompt_text = json.dumps(messages, ensure_ascii=False, default=str)
+        size = len(response.encode("utf-8"))
+        tokens = estimate_tokens(prompt_text) + estimate_tokens(response)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, response, size, estimated_tokens, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, tokens, time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until under max_bytes; caller must hold the lock."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM llm_responses ORDER BY last_used").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+            total -= size
+
+    def report(self) -> str:
+        """Summarize hit rate and estimated tokens saved during this run."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            hit_rate = self.hits / lookups * 100 if lookups else 0.0
+            return (
+                f"LLM cache: {self.hits}/{lookups} hits ({hit_rate:.1f}%), "
+                f"~{self.tokens_saved} tokens saved"
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def cache_from_env() -> LLMResponseCache:
+    """Create the response cache, sized by LLM_CACHE_MAX_MB."""
+    max_mb = float(os.getenv("LLM_CACHE_MAX_MB", DEFAULT_MAX_MB))
+    return LLMResponseCache(max_bytes=int(max_mb * 1024 * 1024))
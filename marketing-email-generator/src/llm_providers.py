@@ -1,20 +1,121 @@
 from enum import Enum
 import os
+import threading
+import time
+from typing import Dict, Optional
 from crewai import LLM
+from src.llm_cache import LLMResponseCache
+from src.metrics import count_tokens, get_metrics
 
 class LLMProvider(Enum):
     DEEPSEEK = "DEEPSEEK"
     OPENAI = "OPENAI"
     OLLAMA = "OLLAMA"
 
-def initialize_llm(provider: LLMProvider) -> LLM:
+
+class RequestRateLimiter:
+    """Spaces out requests so they stay under a requests-per-minute limit, across threads."""
+
+    def __init__(self, requests_per_minute: Optional[float] = None):
+        self.min_interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_allowed = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until the next request is allowed."""
+        if self.min_interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_allowed)
+            self._next_allowed = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# One limiter per provider, shared by every LLM instance talking to it
+_rate_limiters: Dict[LLMProvider, RequestRateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: LLMProvider) -> RequestRateLimiter:
+    """Return the shared rate limiter for a provider, configured by <PROVIDER>_RPM."""
+    with _rate_limiters_lock:
+        if provider not in _rate_limiters:
+            rpm = os.getenv(f"{provider.value}_RPM")
+            _rate_limiters[provider] = RequestRateLimiter(float(rpm) if rpm else None)
+        return _rate_limiters[provider]
+
+
+# crewAI 0.76's LLM.call swaps the global sys.stdout/sys.stderr for a buffer
+# and sets the global litellm callbacks for the calling agent. Overlapping
+# calls restore each other's buffers, leaving output redirected for good,
+# and report token usage to the wrong agent, so calls are made one at a time.
+_llm_call_lock = threading.Lock()
+
+
+class ProviderLLM(LLM):
+    """crewAI LLM with a per-provider rate limit and an optional response cache.
+
+    Cached completions are returned without waiting for the rate limiter.
+    Completions are serialized across threads (see _llm_call_lock); crews
+    running concurrently still overlap their research tools and other work.
+    """
+
+    def __init__(
+        self,
+        *args,
+        provider: Optional[LLMProvider] = None,
+        rate_limiter: Optional[RequestRateLimiter] = None,
+        response_cache: Optional[LLMResponseCache] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.provider = provider
+        self.rate_limiter = rate_limiter or RequestRateLimiter()
+        self.response_cache = response_cache
+
+    def call(self, messages, *args, **kwargs):
+        key = None
+        if self.response_cache is not None:
+            key = self.response_cache.make_key(
+                self.provider.value if self.provider else "",
+                self.model,
+                getattr(self, "temperature", None),
+                messages,
+            )
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                get_metrics().record_llm_call(self.model, 0.0, 0.0, 0, 0, cached=True)
+                return cached
+
+        wait_started = time.monotonic()
+        self.rate_limiter.wait()
+        with _llm_call_lock:
+            started = time.monotonic()
+            response = super().call(messages, *args, **kwargs)
+        get_metrics().record_llm_call(
+            self.model,
+            time.monotonic() - started,
+            started - wait_started,
+            count_tokens(self.model, messages=messages),
+            count_tokens(self.model, text=response if isinstance(response, str) else str(response)),
+            cached=False,
+        )
+        if key is not None and isinstance(response, str) and response:
+            self.response_cache.put(key, messages, response)
+        return response
+
+
+def initialize_llm(provider: LLMProvider, response_cache: Optional[LLMResponseCache] = None) -> LLM:
     """Initialize LLM based on the selected provider.
     
     Args:
         provider: The LLM provider to use
+        response_cache: Optional cache answering repeated completions locally
             
     Returns:
-        LLM: Initialized LLM instance
+        LLM: Initialized LLM instance, rate limited per provider
         
     Raises:
         ValueError: If provider is invalid or env vars are missing
@@ -48,4 +149,27 @@ def initialize_llm(provider: LLMProvider) -> LLM:
     if any(value is None for value in config.values()):
         raise ValueError(f"Missing required environment variables for {provider.value}")
         
-    return LLM(**config) 
\ No newline at end of file
+    return ProviderLLM(
+        provider=provider,
+        rate_limiter=get_rate_limiter(provider),
+        response_cache=response_cache,
+        **config,
+    )
+
+
+def initialize_active_llm(response_cache: Optional[LLMResponseCache] = None) -> LLM:
+    """Initialize the LLM for the provider named in ACTIVE_LLM.
+
+    Raises:
+        ValueError: If ACTIVE_LLM is not a supported provider
+    """
+    active_llm = os.getenv("ACTIVE_LLM", "").upper()
+    print(f"Active LLM: {active_llm}")
+    try:
+        provider = LLMProvider(active_llm)
+    except ValueError:
+        raise ValueError(
+            f"Invalid LLM provider: {active_llm}. "
+            f"Must be one of: {', '.join([p.value for p in LLMProvider])}"
+        )
+    return initialize_llm(provider, response_cache=response_cache) 
\ No newline at end of file
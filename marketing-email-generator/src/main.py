@@ -1,44 +1,202 @@
 #!/usr/bin/env python
-# Disable OTEL SDK
+# Disable OTEL SDK unless explicitly enabled in the environment
 import os
-os.environ["OTEL_SDK_DISABLED"] = "true"
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+import argparse
 import sys
-from src.crew import MarketingEmailGeneratorCrew
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src.crew import IndustryResearchCrew, MarketingEmailGeneratorCrew
 from src.data_loader import load_sender_info, load_target_info
+from src.email_sink import DEFAULT_OUTPUT_PATH, JsonlEmailSink, emails_from_output
+from src.llm_cache import cache_from_env
+from src.llm_providers import initialize_active_llm
+from src.metrics import RunMetrics, get_metrics, set_metrics
+from src.progress_ledger import DONE, ProgressLedger, target_key
+from src.research_cache import get_research_cache
+
+def parse_run_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate personalized marketing emails")
+    parser.add_argument("targets_csv", nargs="?", default="targets.csv", help="CSV of target companies")
+    parser.add_argument("sender_csv", nargs="?", default="sender.csv", help="CSV with the sender information")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of targets processed by concurrent crews; LLM calls still run one at a time (default: 1)",
+    )
+    parser.add_argument(
+        "--llm-cache",
+        action="store_true",
+        help="Reuse stored completions for identical LLM requests (sized by LLM_CACHE_MAX_MB)",
+    )
+    parser.add_argument(
+        "--output",
+        default=DEFAULT_OUTPUT_PATH,
+        help=f"JSON Lines file generated emails are appended to (default: {DEFAULT_OUTPUT_PATH})",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=3,
+        help="Attempts per target across runs before it is no longer retried (default: 3)",
+    )
+    return parser.parse_args(argv)
+
+def industry_key(target_data):
+    """Targets with the same industry, category and subcategory share industry research."""
+    return tuple(
+        " ".join(target_data.get(field, "").lower().split())
+        for field in ("industry", "category", "subcategory")
+    )
+
+def research_industry(llm, key, target_data):
+    """Run industry research for one industry key, reusing a cached result when available."""
+    print(f"\nResearching industry: {' / '.join(part for part in key if part) or 'Unknown'}")
+    inputs = {field: target_data.get(field, "") for field in ("industry", "category", "subcategory")}
+
+    def kickoff():
+        result = IndustryResearchCrew(llm=llm).crew().kickoff(inputs=inputs)
+        get_metrics().record_crew_usage(result)
+        return result.raw
+
+    with get_metrics().target(f"industry: {' / '.join(key)}"):
+        return get_research_cache().cached_call("industry_research", "|".join(key), kickoff)
+
+def research_industries(llm, targets, executor):
+    """
+    Research each distinct industry in the batch once.
+
+    Returns:
+        Mapping of industry key to the research text; failed keys map to ""
+    """
+    groups = {}
+    for target_data in targets:
+        groups.setdefault(industry_key(target_data), target_data)
+    print(f"\nResearching {len(groups)} industries for {len(targets)} companies")
+
+    futures = {
+        executor.submit(research_industry, llm, key, target_data): key
+        for key, target_data in groups.items()
+    }
+    results = {}
+    for future in as_completed(futures):
+        key = futures[future]
+        try:
+            results[key] = future.result()
+        except Exception as industry_error:
+            print(f"Error researching industry {' / '.join(key)}: {str(industry_error)}")
+            results[key] = ""
+    return results
+
+def generate_email(llm, sink, idx, target_data, sender_info):
+    """Run a crew for one target company, sharing the given LLM, and append its emails to the sink."""
+    print(f"\nProcessing company {idx}: {target_data.get('company', 'Unknown')}")
+    
+    # Combine target and sender information
+    inputs = {**target_data, **sender_info}
+    
+    # Each target gets its own crew; the LLM client and parsed configs are shared
+    with get_metrics().target(f"{idx}. {target_data.get('company', 'Unknown')}"):
+        result = MarketingEmailGeneratorCrew(llm=llm).crew().kickoff(inputs=inputs)
+        get_metrics().record_crew_usage(result)
+    emails = emails_from_output(result)
+    if not emails:
+        raise ValueError("Crew returned no emails")
+    sink.append(emails)
+    print(f"Saved {len(emails)} emails for company {idx} to {sink.path}")
+    return emails
+
+def print_status_report(statuses):
+    """Print the outcome of every target in the batch and a summary count."""
+    print("\nTarget status:")
+    counts = {}
+    for idx in sorted(statuses):
+        company, status = statuses[idx]
+        counts[status.split(" ")[0]] = counts.get(status.split(" ")[0], 0) + 1
+        print(f"  {idx}. {company}: {status}")
+    print("Summary: " + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
 
 def run():
     """
     Run the crew for multiple companies from CSV files.
     
     Usage:
-    python main.py targets.csv sender.csv
+    python main.py targets.csv sender.csv [--concurrency N] [--max-attempts N]
     """
     try:
-        # Get file paths from command line arguments or use defaults
-        targets_csv = sys.argv[1] if len(sys.argv) > 1 else "targets.csv"
-        sender_csv = sys.argv[2] if len(sys.argv) > 2 else "sender.csv"
+        args = parse_run_args()
+        set_metrics(RunMetrics.for_run())
+        if args.concurrency > 1:
+            print(
+                f"Warning: --concurrency {args.concurrency} overlaps research and other crew work, but LLM calls "
+                "run one at a time because crewAI redirects stdout and sets litellm callbacks globally during each call"
+            )
         
         # Load data using the data_loader functions
-        sender_info = load_sender_info(sender_csv)
+        sender_info = load_sender_info(args.sender_csv)
         
         # Load and process target companies
-        targets = load_target_info(targets_csv)
+        targets = load_target_info(args.targets_csv)
 
-        
-        # Process each target company
+        # One LLM client for the whole batch; rate limits apply across all crews
+        response_cache = cache_from_env() if args.llm_cache else None
+        llm = initialize_active_llm(response_cache=response_cache)
+
+        # Each finished target is appended as soon as its crew completes
+        sink = JsonlEmailSink(args.output)
+
+        # Skip targets finished by earlier runs and those out of retries
+        ledger = ProgressLedger.for_output(args.output)
+        statuses = {}
+        pending = []
         for idx, target_data in enumerate(targets, start=1):
-            try:
-                print(f"\nProcessing company {idx}: {target_data.get('company', 'Unknown')}")
-                
-                # Combine target and sender information
-                inputs = {**target_data, **sender_info}
-                
-                # Initialize crew with specific provider and generate email
-                MarketingEmailGeneratorCrew().crew().kickoff(inputs=inputs)
-                
-            except Exception as company_error:
-                print(f"Error processing company {idx}: {str(company_error)}")
-                continue
+            key = target_key(target_data)
+            company = target_data.get('company', 'Unknown')
+            if ledger.status(key) == DONE:
+                statuses[idx] = (company, "skipped (already done)")
+            elif not ledger.should_run(key, args.max_attempts):
+                statuses[idx] = (company, f"skipped (failed {ledger.attempts(key)} times)")
+            else:
+                pending.append((idx, target_data))
+        print(f"\n{len(pending)} of {len(targets)} companies left to process (progress in {ledger.path})")
+        
+        # Process target companies on a bounded pool of in-flight crews
+        with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+            # Industry research depends only on the industry, so run it once per group
+            industry_research = research_industries(llm, [target_data for _, target_data in pending], executor)
+            futures = {
+                executor.submit(
+                    generate_email,
+                    llm,
+                    sink,
+                    idx,
+                    {**target_data, "industry_research": industry_research[industry_key(target_data)]},
+                    sender_info,
+                ): (idx, target_data)
+                for idx, target_data in pending
+            }
+            for future in as_completed(futures):
+                idx, target_data = futures[future]
+                key = target_key(target_data)
+                company = target_data.get('company', 'Unknown')
+                try:
+                    future.result()
+                    ledger.record_done(key, company)
+                    statuses[idx] = (company, "done")
+                except Exception as company_error:
+                    print(f"Error processing company {idx}: {str(company_error)}")
+                    ledger.record_failed(key, company, str(company_error))
+                    statuses[idx] = (
+                        company,
+                        f"failed (attempt {ledger.attempts(key)}/{args.max_attempts}): {company_error}",
+                    )
+                    continue
+
+        print_status_report(statuses)
+        print(f"\n{get_metrics().report()}")
+
+        if response_cache is not None:
+            print(f"\n{response_cache.report()}")
                     
     except Exception as e:
         print(f"Error: {e}")
@@ -0,0 +1,230 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import litellm
+
+from src.llm_cache import estimate_tokens
+
+DEFAULT_METRICS_DIR = os.path.join("output", "metrics")
+
+
+def count_tokens(model: str, messages: Optional[List[dict]] = None, text: Optional[str] = None) -> int:
+    """Count tokens with the model's tokenizer, falling back to a character estimate."""
+    try:
+        if messages is not None:
+            return litellm.token_counter(model=model, messages=messages)
+        return litellm.token_counter(model=model, text=text or "")
+    except Exception:
+        return estimate_tokens(json.dumps(messages, default=str) if messages is not None else text or "")
+
+
+class RunMetrics:
+    """
+    Records where generation time and tokens go, per target and per task.
+
+    crewAI runs a crew's tasks sequentially on the thread that called
+    kickoff, so the current target and task are tracked per thread: LLM and
+    tool calls are attributed to the task in progress, and a task ends when
+    the crew's task_callback fires. Every event is appended to a JSON Lines
+    file as it happens; summary() aggregates them by task, agent and target.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: JSON Lines file for events; None keeps metrics in memory only
+        """
+        self.path = path
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if path:
+            metrics_dir = os.path.dirname(path)
+            if metrics_dir:
+                os.makedirs(metrics_dir, exist_ok=True)
+
+    @classmethod
+    def for_run(cls, metrics_dir: str = DEFAULT_METRICS_DIR) -> "RunMetrics":
+        """Create metrics written to a timestamped file for this run."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return cls(os.path.join(metrics_dir, f"run_{timestamp}.jsonl"))
+
+    @contextmanager
+    def target(self, label: str):
+        """Attribute everything run inside the block on this thread to a target."""
+        self._local.target = label
+        self._start_task()
+        started = time.monotonic()
+        status = "done"
+        try:
+            yield
+        except Exception:
+            status = "failed"
+            raise
+        finally:
+            self._record({"type": "target", "target": label, "seconds": time.monotonic() - started, "status": status})
+            self._local.target = None
+
+    def task_finished(self, task_output: Any):
+        """crewAI task_callback: close the task in progress on this thread."""
+        task = self._current_task()
+        self._record(
+            {
+                "type": "task",
+                "target": getattr(self._local, "target", None),
+                "task": getattr(task_output, "name", None) or "unknown",
+                "agent": str(getattr(task_output, "agent", "") or ""),
+                "seconds": time.monotonic() - task["started"],
+                **task["counters"],
+            }
+        )
+        self._start_task()
+
+    def record_llm_call(self, model: str, seconds: float, wait_seconds: float, prompt_tokens: int, completion_tokens: int, cached: bool):
+        counters = self._current_task()["counters"]
+        counters["llm_calls"] += 1
+        counters["llm_seconds"] += seconds
+        counters["prompt_tokens"] += prompt_tokens
+        counters["completion_tokens"] += completion_tokens
+        self._record(
+            {
+                "type": "llm_call",
+                "target": getattr(self._local, "target", None),
+                "model": model,
+                "seconds": seconds,
+                "rate_limit_wait_seconds": wait_seconds,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cached": cached,
+            }
+        )
+
+    def record_tool_call(self, tool: str, seconds: float, cached: bool):
+        counters = self._current_task()["counters"]
+        counters["tool_calls"] += 1
+        counters["tool_seconds"] += seconds
+        self._record(
+            {
+                "type": "tool_call",
+                "target": getattr(self._local, "target", None),
+                "tool": tool,
+                "seconds": seconds,
+                "cached": cached,
+            }
+        )
+
+    def record_crew_usage(self, crew_output: Any):
+        """Record the token usage crewAI reports for a finished crew."""
+        usage = getattr(crew_output, "token_usage", None)
+        if usage is None:
+            return
+        self._record(
+            {
+                "type": "crew_usage",
+                "target": getattr(self._local, "target", None),
+                "total_tokens": getattr(usage, "total_tokens", 0),
+                "prompt_tokens": getattr(usage, "prompt_tokens", 0),
+                "completion_tokens": getattr(usage, "completion_tokens", 0),
+                "successful_requests": getattr(usage, "successful_requests", 0),
+            }
+        )
+
+    def _start_task(self):
+        self._local.task = {
+            "started": time.monotonic(),
+            "counters": {
+                "llm_calls": 0,
+                "llm_seconds": 0.0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "tool_calls": 0,
+                "tool_seconds": 0.0,
+            },
+        }
+
+    def _current_task(self) -> dict:
+        if getattr(self._local, "task", None) is None:
+            self._start_task()
+        return self._local.task
+
+    def _record(self, event: Dict[str, Any]):
+        event["at"] = time.time()
+        with self._lock:
+            self.events.append(event)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(event, default=str) + "\n")
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate task events by task and by agent, and target events overall."""
+        with self._lock:
+            events = list(self.events)
+
+        def aggregate(key: str) -> Dict[str, Dict[str, float]]:
+            totals: Dict[str, Dict[str, float]] = {}
+            for event in events:
+                if event["type"] != "task":
+                    continue
+                entry = totals.setdefault(
+                    event[key],
+                    {"count": 0, "seconds": 0.0, "llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "tool_seconds": 0.0},
+                )
+                entry["count"] += 1
+                for field in ("seconds", "llm_calls", "prompt_tokens", "completion_tokens", "tool_seconds"):
+                    entry[field] += event[field]
+            return totals
+
+        targets = [event for event in events if event["type"] == "target"]
+        tools: Dict[str, Dict[str, float]] = {}
+        for event in events:
+            if event["type"] == "tool_call":
+                entry = tools.setdefault(event["tool"], {"calls": 0, "cached": 0, "seconds": 0.0})
+                entry["calls"] += 1
+                entry["cached"] += int(event["cached"])
+                entry["seconds"] += event["seconds"]
+        return {
+            "targets": len(targets),
+            "target_seconds": sum(event["seconds"] for event in targets),
+            "by_task": aggregate("task"),
+            "by_agent": aggregate("agent"),
+            "by_tool": tools,
+        }
+
+    def report(self) -> str:
+        """Human-readable summary, slowest agents first; also appended to the metrics file."""
+        summary = self.summary()
+        self._record({"type": "summary", **summary})
+        lines = [f"Metrics for {summary['targets']} targets ({summary['target_seconds']:.1f}s total)"]
+        for title, key in (("By agent", "by_agent"), ("By task", "by_task")):
+            lines.append(f"{title}:")
+            for name, entry in sorted(summary[key].items(), key=lambda item: -item[1]["seconds"]):
+                lines.append(
+                    f"  {name}: {entry['seconds']:.1f}s over {entry['count']} runs, "
+                    f"{entry['llm_calls']} LLM calls, {entry['prompt_tokens']} prompt / "
+                    f"{entry['completion_tokens']} completion tokens, {entry['tool_seconds']:.1f}s in tools"
+                )
+        lines.append("By tool:")
+        for name, entry in sorted(summary["by_tool"].items(), key=lambda item: -item[1]["seconds"]):
+            lines.append(f"  {name}: {entry['calls']} calls ({entry['cached']} cached), {entry['seconds']:.1f}s")
+        if self.path:
+            lines.append(f"Details in {self.path}")
+        return "\n".join(lines)
+
+
+_metrics = RunMetrics()
+
+
+def get_metrics() -> RunMetrics:
+    """Return the metrics collector for this process."""
+    return _metrics
+
+
+def set_metrics(metrics: RunMetrics):
+    """Replace the process metrics collector, e.g. with one writing to a file."""
+    global _metrics
+    _metrics = metrics
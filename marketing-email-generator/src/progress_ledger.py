@@ -0,0 +1,102 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+DONE = "done"
+FAILED = "failed"
+
+
+def target_key(target_data: Dict[str, str]) -> str:
+    """Stable key for a target: its email, else its website, else its company name."""
+    email = target_data.get("email", "").strip().lower()
+    if email:
+        return f"email:{email}"
+    website = target_data.get("website", "").strip().lower()
+    if website:
+        website = website.split("://", 1)[-1]
+        if website.startswith("www."):
+            website = website[4:]
+        return f"website:{website.rstrip('/')}"
+    return f"company:{' '.join(target_data.get('company', '').lower().split())}"
+
+
+class ProgressLedger:
+    """
+    Append-only JSON Lines record of which targets have been generated.
+
+    Every attempt appends one entry and is fsync'd; on load the last entry
+    per key wins and failed attempts are counted, so a restarted batch skips
+    finished targets and retries failures up to a limit.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: JSON Lines file holding the ledger
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+        ledger_dir = os.path.dirname(path)
+        if ledger_dir:
+            os.makedirs(ledger_dir, exist_ok=True)
+        self._load()
+
+    @classmethod
+    def for_output(cls, output_path: str) -> "ProgressLedger":
+        """Create the ledger that tracks progress for an output file."""
+        return cls(f"{os.path.splitext(output_path)[0]}.progress.jsonl")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                # Drop a partial entry left by a crash so appends start on a fresh line
+                f.truncate(data.rfind(b"\n") + 1)
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                    self._entries[entry["key"]] = entry
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    print(f"Ignoring unreadable progress entry in {self.path}")
+
+    def status(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry["status"] if entry else None
+
+    def attempts(self, key: str) -> int:
+        """Number of failed attempts recorded for a key since it last succeeded."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.get("failures", 0) if entry else 0
+
+    def should_run(self, key: str, max_attempts: int) -> bool:
+        """True if the target is not done and has failed fewer than max_attempts times."""
+        return self.status(key) != DONE and self.attempts(key) < max_attempts
+
+    def record_done(self, key: str, company: str):
+        self._append({"key": key, "company": company, "status": DONE, "failures": self.attempts(key)})
+
+    def record_failed(self, key: str, company: str, error: str):
+        self._append(
+            {"key": key, "company": company, "status": FAILED, "failures": self.attempts(key) + 1, "error": error}
+        )
+
+    def _append(self, entry: dict):
+        entry["at"] = time.time()
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._entries[entry["key"]] = entry
@@ -0,0 +1,163 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from crewai_tools import SerperDevTool, ScrapeWebsiteTool
+
+from src.metrics import get_metrics
+
+DEFAULT_DB_PATH = os.path.join("cache", "research.sqlite")
+DEFAULT_TTL_HOURS = 7 * 24
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase a search query and collapse its whitespace."""
+    return " ".join(str(query).lower().split())
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL so scheme, "www.", host case, fragments and trailing slashes don't split cache entries."""
+    url = str(url).strip()
+    if "://" not in url:
+        url = f"https://{url}"
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path.rstrip("/")
+    return urlunsplit(("", host, path, parts.query, "")).lstrip("/")
+
+
+class ResearchCache:
+    """
+    Disk-backed cache of research tool results with TTL eviction.
+
+    Results are stored as JSON in SQLite, keyed by tool name and a
+    normalized query or URL. Entries older than the TTL are ignored and
+    purged, so stale research is fetched again.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, ttl_hours: float = DEFAULT_TTL_HOURS):
+        """
+        Args:
+            db_path: SQLite file backing the cache
+            ttl_hours: Hours a cached result stays valid
+        """
+        self.ttl_seconds = ttl_hours * 3600
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS research_results ("
+            "tool TEXT NOT NULL, key TEXT NOT NULL, result TEXT NOT NULL, created_at REAL NOT NULL, "
+            "PRIMARY KEY (tool, key))"
+        )
+        self.purge_expired()
+
+    def get(self, tool: str, key: str) -> Optional[Any]:
+        """Return the cached result for a tool call, or None if missing or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, created_at FROM research_results WHERE tool = ? AND key = ?",
+                (tool, key),
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            return None
+        return json.loads(row[0])
+
+    def put(self, tool: str, key: str, result: Any):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO research_results (tool, key, result, created_at) VALUES (?, ?, ?, ?)",
+                (tool, key, json.dumps(result), time.time()),
+            )
+            self._conn.commit()
+
+    def purge_expired(self):
+        """Delete entries older than the TTL."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM research_results WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,),
+            )
+            self._conn.commit()
+
+    def lookup(self, tool: str, key: str, compute) -> Tuple[Any, bool]:
+        """
+        Return the cached result for key, or compute and store it; empty results are not stored.
+
+        Returns:
+            (result, whether it came from the cache)
+        """
+        result = self.get(tool, key)
+        if result is not None:
+            print(f"Research cache hit for {tool}: {key}")
+            return result, True
+        result = compute()
+        if result:
+            self.put(tool, key, result)
+        return result, False
+
+    def cached_call(self, tool: str, key: str, compute):
+        """Return the cached result for key, or compute and store it."""
+        return self.lookup(tool, key, compute)[0]
+
+
+_default_cache: Optional[ResearchCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_research_cache() -> ResearchCache:
+    """Return the process-wide research cache; RESEARCH_CACHE_TTL_HOURS sets its TTL."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            ttl_hours = float(os.getenv("RESEARCH_CACHE_TTL_HOURS", DEFAULT_TTL_HOURS))
+            _default_cache = ResearchCache(ttl_hours=ttl_hours)
+        return _default_cache
+
+
+def timed_lookup(tool: str, key: str, compute) -> Any:
+    """Answer a tool call from the research cache, recording its latency."""
+    started = time.monotonic()
+    result, cached = get_research_cache().lookup(tool, key, compute)
+    get_metrics().record_tool_call(tool, time.monotonic() - started, cached)
+    return result
+
+
+class CachedSerperDevTool(SerperDevTool):
+    """SerperDevTool that answers repeated searches from the research cache."""
+
+    def _run(self, **kwargs: Any) -> Any:
+        query = kwargs.get("search_query") or kwargs.get("query") or ""
+        key = json.dumps(
+            [
+                normalize_query(query),
+                getattr(self, "n_results", None),
+                getattr(self, "country", None),
+                getattr(self, "location", None),
+                getattr(self, "locale", None),
+            ]
+        )
+        return timed_lookup("serper", key, lambda: super(CachedSerperDevTool, self)._run(**kwargs))
+
+
+class CachedScrapeWebsiteTool(ScrapeWebsiteTool):
+    """ScrapeWebsiteTool that answers repeated page reads from the research cache."""
+
+    def _run(self, **kwargs: Any) -> Any:
+        website_url = kwargs.get("website_url") or getattr(self, "website_url", None)
+        if not website_url:
+            return super()._run(**kwargs)
+        return timed_lookup(
+            "scrape_website",
+            normalize_url(website_url),
+            lambda: super(CachedScrapeWebsiteTool, self)._run(**kwargs),
+        )
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger()
+
+DEFAULT_DB_PATH = os.path.join("cache", "company_index.sqlite")
+
+
+def listing_fingerprint(card_text):
+    """Hash the text of a company's listing card.
+
+    The card shows the name, score and review count, so the fingerprint
+    changes whenever the company gets new reviews or edits its listing.
+    """
+    normalized = " ".join(card_text.split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class CompanyIndex:
+    """Persistent index of company profile URLs seen across runs.
+
+    For each profile it keeps the listing fingerprint, when the URL was last
+    seen on a listing page, when the profile was last fetched and the details
+    scraped from it. A profile whose fingerprint is unchanged and whose last
+    fetch is younger than the TTL does not need to be visited again.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, ttl_days=30):
+        """
+        Args:
+            db_path: SQLite file backing the index
+            ttl_days: Days after which an unchanged profile is fetched again
+        """
+        self.ttl_seconds = ttl_days * 24 * 3600
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS companies ("
+            "url TEXT PRIMARY KEY, fingerprint TEXT, last_seen REAL NOT NULL, "
+            "last_fetched REAL, details TEXT)"
+        )
+        self._conn.commit()
+
+    def fresh_details(self, url, fingerprint):
+        """Record that the URL was seen and return its stored details if still valid.
+
+        Returns:
+            dict of stored details, or None if the profile must be fetched
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, last_fetched, details FROM companies WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                self._conn.execute(
+                    "INSERT INTO companies (url, fingerprint, last_seen) VALUES (?, ?, ?)",
+                    (url, fingerprint, now),
+                )
+            else:
+                self._conn.execute("UPDATE companies SET last_seen = ? WHERE url = ?", (now, url))
+            self._conn.commit()
+
+        if row is None or row[1] is None or row[2] is None:
+            return None
+        if row[0] != fingerprint or now - row[1] > self.ttl_seconds:
+            return None
+        return json.loads(row[2])
+
+    def store(self, url, fingerprint, details):
+        """Save the details fetched for a profile along with its current fingerprint."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO companies (url, fingerprint, last_seen, last_fetched, details) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (url, fingerprint, now, now, json.dumps(details)),
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RunCompanyDetails:
+    """Company details resolved during the current run, shared by all workers.
+
+    The first worker to claim a profile URL fetches it; workers reaching the
+    same URL from another subcategory wait for that result instead of loading
+    the page again.
+    """
+
+    def __init__(self):
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def claim(self, url):
+        """Claim a profile URL for fetching.
+
+        Returns:
+            (True, None) if the caller must fetch the URL and then call
+            resolve, or (False, details) once another worker resolved it
+        """
+        with self._lock:
+            future = self._results.get(url)
+            if future is None:
+                self._results[url] = Future()
+                return True, None
+        return False, future.result()
+
+    def resolve(self, url, details):
+        """Publish the details for a claimed URL; None lets a later claim retry it."""
+        with self._lock:
+            future = self._results[url]
+            if details is None:
+                del self._results[url]
+        future.set_result(details)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._results)
@@ -1,24 +1,36 @@
 from utils import load_json, setup_logger
+from company_index import CompanyIndex, RunCompanyDetails
+from run_output import RunCheckpoint, StreamingCsvWriter
+from scheduler import SubcategoryScheduler
 from scraper import (
     initialize_driver,
     scroll_to_load,
     extract_companies,
     fetch_company_details,
 )
-import pandas as pd
+import argparse
+import functools
+import logging
 import os
+from concurrent.futures import as_completed
 from datetime import datetime
 import json
 import sys
 
+OUTPUT_DIR = "output"
+OUTPUT_COLUMNS = [
+    'Company Name', 'Category', 'Subcategory', 'Phone', 'Email', 'Address',
+    'Website', 'Instagram', 'Facebook', 'Twitter', 'LinkedIn', 'Rating',
+]
+
 
 def format_company_data(companies, company_details):
     formatted_data = []
-    # Convert company_details list to a dictionary with company names as keys
-    company_details_dict = {company['name']: company for company in company_details}
+    # Key details by profile URL; different companies can share a name
+    company_details_dict = {company['url']: company for company in company_details}
     
     for company in companies:
-        company_info = company_details_dict.get(company['name'], {})
+        company_info = company_details_dict.get(company['url'], {})
         social_links = company_info.get('social_links', {})
         row = {
             'Company Name': company['name'],
@@ -38,7 +50,61 @@ def format_company_data(companies, company_details):
     return formatted_data
 
 
+def scrape_subcategory(driver, category, name, url, index=None, run_details=None):
+    """Scrape one subcategory listing and return its formatted rows."""
+    logger = logging.getLogger()
+    logger.info(f"Processing subcategory: {name} at {url}")
+
+    driver.get(url)
+    scroll_to_load(driver, name)
+    companies = extract_companies(driver)
+    print("companies extracted")
+    print(companies)
+    company_details = fetch_company_details(driver, companies, index=index, run_details=run_details)
+    print("company details fetched")
+    print(company_details)
+    formatted_data = format_company_data(companies, company_details)
+    for row in formatted_data:
+        row['Category'] = category
+        row['Subcategory'] = name
+    return formatted_data
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape company listings from Homestar")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of browsers scraping subcategories in parallel (default: 1)",
+    )
+    parser.add_argument(
+        "--min-request-interval",
+        type=float,
+        default=1.0,
+        help="Minimum seconds between page loads on the same host, across all workers (default: 1.0)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the most recent unfinished run, skipping subcategories already written",
+    )
+    parser.add_argument(
+        "--refresh-days",
+        type=float,
+        default=30,
+        help="Days after which an unchanged company profile is fetched again (default: 30)",
+    )
+    parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Fetch every company profile, ignoring the company index",
+    )
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
     print("Starting Homestar Scraper")
     # Create logs directory if it doesn't exist
     os.makedirs("logs", exist_ok=True)
@@ -65,49 +131,67 @@ def main():
     print(categories)
     logger.info(f"Loaded {len(categories)} categories.")
     print("logger info")
-    # Initialize WebDriver
-    driver = initialize_driver()
-    all_company_data = []
+
+    tasks = []
+    for category, subcategories in categories.items():
+        for subcategory_dict in subcategories:
+            # Safer dictionary unpacking
+            if not subcategory_dict or len(subcategory_dict) != 1:
+                logger.warning(
+                    f"Skipping invalid subcategory format: {subcategory_dict}"
+                )
+                continue
+
+            name = next(iter(subcategory_dict.keys()))
+            tasks.append((category, name, subcategory_dict[name]))
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    checkpoint = RunCheckpoint.latest_unfinished(OUTPUT_DIR) if args.resume else None
+    if checkpoint:
+        checkpoint.truncate_output()
+        tasks = [task for task in tasks if not checkpoint.is_completed(task[0], task[1])]
+        logger.info(f"Resuming run {checkpoint.output_file}: {len(checkpoint.completed)} subcategories already done")
+    else:
+        if args.resume:
+            logger.info("No unfinished run to resume, starting a new one")
+        checkpoint = RunCheckpoint.create(OUTPUT_DIR, datetime.now().strftime("%Y%m%d_%H%M%S"))
+    logger.info(f"Scheduling {len(tasks)} subcategories on {args.workers} workers")
+
+    writer = StreamingCsvWriter(checkpoint.output_file, OUTPUT_COLUMNS)
+    index = None if args.full_refresh else CompanyIndex(ttl_days=args.refresh_days)
+    run_details = RunCompanyDetails()
+    scheduler = SubcategoryScheduler(
+        initialize_driver,
+        workers=args.workers,
+        min_request_interval=args.min_request_interval,
+    )
+    failed = 0
     try:
-        for category, subcategories in categories.items():
-            logger.info(f"Processing category: {category}")
-            print("processing category")
-            print(subcategories)
-            for subcategory_dict in subcategories:
-                # Safer dictionary unpacking
-                if not subcategory_dict or len(subcategory_dict) != 1:
-                    logger.warning(
-                        f"Skipping invalid subcategory format: {subcategory_dict}"
-                    )
-                    continue
-
-                name = next(iter(subcategory_dict.keys()))
-                url = subcategory_dict[name]
-                logger.info(f"Processing subcategory: {name} at {url}")
-
-                driver.get(url)
-                scroll_to_load(driver, name)
-                companies = extract_companies(driver)
-                print("companies extracted")
-                print(companies)
-                company_details = fetch_company_details(driver, companies)
-                print("company details fetched")
-                print(company_details)
-                formatted_data = format_company_data(companies, company_details)
-                for row in formatted_data:
-                    row['Category'] = category
-                    row['Subcategory'] = name
-                all_company_data.extend(formatted_data)
-            print("all company data")
-            print(all_company_data)
-            os.makedirs("output", exist_ok=True)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_file = f"output/homestar_data_{timestamp}.csv"
-            df = pd.DataFrame(all_company_data)
-            df.to_csv(output_file, index=False)
-            logger.info(f"Data saved to {output_file}")
+        futures = scheduler.submit_all(tasks, functools.partial(scrape_subcategory, index=index, run_details=run_details))
+        task_by_future = dict(zip(futures, tasks))
+        # Stream each subcategory to disk as soon as it finishes
+        for future in as_completed(futures):
+            category, name, _ = task_by_future[future]
+            try:
+                rows = future.result()
+            except Exception as e:
+                failed += 1
+                logger.error(f"Failed to scrape subcategory {name}: {e}")
+                continue
+            output_size = writer.write_rows(rows)
+            checkpoint.mark_completed(category, name, output_size)
+            logger.info(f"Saved {len(rows)} rows for {category} / {name} to {checkpoint.output_file}")
+
+        logger.info(f"Resolved {len(run_details)} unique company profiles")
+        if failed:
+            logger.warning(f"{failed} subcategories failed; rerun with --resume to retry them")
+        else:
+            checkpoint.mark_finished()
     finally:
-        driver.quit()
+        scheduler.shutdown()
+        writer.close()
+        if index is not None:
+            index.close()
         logger.info("Scraper finished.")
 
 
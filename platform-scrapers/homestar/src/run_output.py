@@ -0,0 +1,112 @@
+import csv
+import glob
+import json
+import logging
+import os
+
+logger = logging.getLogger()
+
+
+class StreamingCsvWriter:
+    """Appends rows to a single CSV file, syncing each batch to disk."""
+
+    def __init__(self, path, fieldnames):
+        self.path = path
+        self.fieldnames = fieldnames
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames, extrasaction="ignore")
+        if self._file.tell() == 0:
+            self._writer.writeheader()
+            self._sync()
+
+    def write_rows(self, rows):
+        """Append rows and return the file size once they are on disk."""
+        self._writer.writerows(rows)
+        self._sync()
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+
+class RunCheckpoint:
+    """Records which subcategories of a run are already in its output CSV.
+
+    The checkpoint stores the CSV size after each completed subcategory, so a
+    resumed run can cut off rows written by a subcategory that was still in
+    progress when the previous run stopped.
+    """
+
+    def __init__(self, path, output_file, completed=None, output_size=0, finished=False):
+        self.path = path
+        self.output_file = output_file
+        self.completed = completed or []
+        self.output_size = output_size
+        self.finished = finished
+
+    @classmethod
+    def create(cls, output_dir, timestamp):
+        os.makedirs(output_dir, exist_ok=True)
+        checkpoint = cls(
+            os.path.join(output_dir, f"homestar_run_{timestamp}.checkpoint.json"),
+            os.path.join(output_dir, f"homestar_data_{timestamp}.csv"),
+        )
+        checkpoint.save()
+        return checkpoint
+
+    @classmethod
+    def latest_unfinished(cls, output_dir):
+        """Return the checkpoint of the most recent unfinished run, if any."""
+        for path in sorted(glob.glob(os.path.join(output_dir, "homestar_run_*.checkpoint.json")), reverse=True):
+            with open(path, "r") as f:
+                data = json.load(f)
+            if not data.get("finished"):
+                return cls(
+                    path,
+                    data["output_file"],
+                    [tuple(item) for item in data.get("completed", [])],
+                    data.get("output_size", 0),
+                )
+        return None
+
+    def is_completed(self, category, subcategory):
+        return (category, subcategory) in self.completed
+
+    def mark_completed(self, category, subcategory, output_size):
+        self.completed.append((category, subcategory))
+        self.output_size = output_size
+        self.save()
+
+    def mark_finished(self):
+        self.finished = True
+        self.save()
+
+    def truncate_output(self):
+        """Drop rows written after the last completed subcategory."""
+        if os.path.exists(self.output_file) and os.path.getsize(self.output_file) > self.output_size:
+            logger.info(f"Discarding partial rows after byte {self.output_size} in {self.output_file}")
+            with open(self.output_file, "r+b") as f:
+                f.truncate(self.output_size)
+
+    def save(self):
+        """Atomically replace the checkpoint file."""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(
+                {
+                    "output_file": self.output_file,
+                    "completed": self.completed,
+                    "output_size": self.output_size,
+                    "finished": self.finished,
+                },
+                f,
+                indent=2,
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
@@ -0,0 +1,160 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from urllib.parse import urlparse
+
+logger = logging.getLogger()
+
+
+class HostRateLimiter:
+    """Enforces a minimum interval between page loads on the same host, across all workers."""
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._next_allowed = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        """Block until a request to the URL's host is allowed."""
+        if self.min_interval <= 0:
+            return
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_allowed.get(host, 0))
+            self._next_allowed[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class RateLimitedDriver:
+    """WebDriver proxy that applies the host rate limit to every driver.get call."""
+
+    def __init__(self, driver, rate_limiter):
+        self._driver = driver
+        self._rate_limiter = rate_limiter
+
+    def get(self, url):
+        self._rate_limiter.wait(url)
+        return self._driver.get(url)
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+class SubcategoryScheduler:
+    """Runs subcategory jobs on a pool of isolated WebDriver instances."""
+
+    def __init__(self, driver_factory, workers=1, min_request_interval=1.0, profile_root="profiles", max_retries=1):
+        """
+        Args:
+            driver_factory: Callable taking a profile directory and returning a new driver
+            workers: Number of drivers running jobs concurrently
+            min_request_interval: Minimum seconds between page loads on one host
+            profile_root: Directory holding one browser profile per worker
+            max_retries: Times a job is retried on a fresh driver after the driver crashes
+        """
+        self.driver_factory = driver_factory
+        self.workers = max(1, workers)
+        self.rate_limiter = HostRateLimiter(min_request_interval)
+        self.profile_root = profile_root
+        self.max_retries = max_retries
+        self._jobs = queue.Queue()
+        self._threads = []
+        # undetected-chromedriver patches its binary on start, so drivers
+        # must not be created concurrently
+        self._driver_factory_lock = threading.Lock()
+
+    def submit_all(self, tasks, job):
+        """
+        Queue a job per task and start the workers.
+
+        Args:
+            tasks: Sequence of task tuples passed to the job
+            job: Callable invoked as job(driver, *task)
+
+        Returns:
+            List of futures, in the same order as tasks
+        """
+        futures = []
+        for task in tasks:
+            future = Future()
+            self._jobs.put((task, job, future))
+            futures.append(future)
+
+        for worker_id in range(1, min(self.workers, len(futures)) + 1):
+            thread = threading.Thread(target=self._run_worker, args=(worker_id,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return futures
+
+    def shutdown(self):
+        """Cancel jobs not started yet and wait for the workers to close their drivers."""
+        while True:
+            try:
+                _, _, future = self._jobs.get_nowait()
+            except queue.Empty:
+                break
+            future.cancel()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _start_driver(self, worker_id):
+        profile_dir = os.path.abspath(os.path.join(self.profile_root, f"worker-{worker_id}"))
+        os.makedirs(profile_dir, exist_ok=True)
+        with self._driver_factory_lock:
+            driver = self.driver_factory(profile_dir)
+        return RateLimitedDriver(driver, self.rate_limiter)
+
+    def _run_worker(self, worker_id):
+        driver = None
+        try:
+            while True:
+                try:
+                    task, job, future = self._jobs.get_nowait()
+                except queue.Empty:
+                    return
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                attempts = 0
+                while True:
+                    try:
+                        if driver is None:
+                            driver = self._start_driver(worker_id)
+                        future.set_result(job(driver, *task))
+                        break
+                    except Exception as e:
+                        if driver is not None and self._driver_alive(driver):
+                            future.set_exception(e)
+                            break
+                        logger.warning(f"Worker {worker_id} driver failed on {task}: {e}")
+                        self._quit_driver(driver)
+                        driver = None
+                        attempts += 1
+                        if attempts > self.max_retries:
+                            future.set_exception(e)
+                            break
+        finally:
+            self._quit_driver(driver)
+
+    @staticmethod
+    def _driver_alive(driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit_driver(driver):
+        if driver is None:
+            return
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug(f"Error closing driver: {e}")
@@ -1,19 +1,23 @@
 import undetected_chromedriver as uc
 from selenium import webdriver
 from selenium.webdriver.common.by import By
+from bs4 import BeautifulSoup
+from urllib.parse import urljoin
 import time
 import logging
+import html
 import json
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.common.exceptions import TimeoutException
 import time
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from company_index import listing_fingerprint
 
 # Configure logging
 logger = logging.getLogger()
 
-def initialize_driver():
-    """Initialize and return the Selenium WebDriver."""
+def initialize_driver(profile_dir=None):
+    """Initialize and return the Selenium WebDriver, optionally with its own browser profile."""
     options = uc.ChromeOptions()
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
@@ -22,190 +26,312 @@ def initialize_driver():
     )
     options.add_argument("--window-size=1440,900")
 
-    return uc.Chrome(options=options)
+    return uc.Chrome(options=options, user_data_dir=profile_dir)
 
 
-def scroll_to_load(driver, subcategory_name):
-    """Scroll to the bottom of the page until all content is loaded."""
-    last_height = driver.execute_script("return document.body.scrollHeight")
-    while True:
+def _listing_state(driver):
+    """Return the page height and number of listed companies in one round trip."""
+    return driver.execute_script(
+        "return [document.body.scrollHeight, document.querySelectorAll('.company-result').length];"
+    )
+
+
+def _listing_changed(previous_state):
+    """Wait condition returning the new listing state once it differs from previous_state."""
+    def condition(driver):
+        current_state = _listing_state(driver)
+        return current_state if current_state != previous_state else False
+    return condition
+
+
+def scroll_to_load(driver, subcategory_name, initial_wait=0.5, max_wait=2.0, max_rounds=500):
+    """Scroll to the bottom of the page until all content is loaded.
+
+    After each scroll, waits only until the page height or company count
+    changes. The wait starts short and doubles while nothing loads; once a
+    wait of max_wait passes without change, the page is considered complete.
+
+    Returns:
+        dict: Scroll rounds needed, companies loaded and elapsed seconds
+    """
+    started = time.monotonic()
+    wait = initial_wait
+    rounds = 0
+    state = _listing_state(driver)
+    while rounds < max_rounds:
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(2)  # Wait for content to load
-        new_height = driver.execute_script("return document.body.scrollHeight")
+        rounds += 1
+        try:
+            state = WebDriverWait(driver, wait, poll_frequency=0.1).until(_listing_changed(state))
+            loaded = True
+        except TimeoutException:
+            loaded = False
         
         # Check for pagination element that indicates bottom of page
         pagination_element = driver.find_elements(By.CLASS_NAME, "pagination-wrap--small")
         if pagination_element:
             logger.info(f"Found pagination element - reached bottom of page for {subcategory_name}")
             break
-            
-        if new_height == last_height:
+
+        if loaded:
+            wait = initial_wait
+        elif wait >= max_wait:
             logger.info(f"Reached bottom of page since height is the same for {subcategory_name}")
             break
-        last_height = new_height
+        else:
+            # Nothing arrived yet; give the next request more time
+            wait = min(wait * 2, max_wait)
+    else:
+        logger.warning(f"Stopped scrolling {subcategory_name} after {max_rounds} rounds")
+
+    stats = {
+        "rounds": rounds,
+        "companies": state[1],
+        "seconds": round(time.monotonic() - started, 1),
+    }
+    logger.info(
+        f"Scroll stats for {subcategory_name}: {stats['rounds']} rounds, "
+        f"{stats['companies']} companies in {stats['seconds']}s"
+    )
+    return stats
 
 
 def extract_companies(driver):
-    """Extract companies with reviews and a valid score from the loaded page."""
+    """Extract companies with reviews and a valid score from the loaded page.
+
+    Names, profile URLs and listing card text are read in a single script
+    call; the card text is hashed into a fingerprint used by the company
+    index to detect changed listings.
+    """
     company_name_urls = []
-    try:
-        company_links = driver.find_elements(By.CSS_SELECTOR, ".company-result .name-row-text__text")
-        for company in company_links:
-            try:
-                name = company.text
-                url = company.get_attribute("href")
-                company_name_urls.append({"name": name, "url": url})
-            except Exception as e:
-                logger.warning(f"Failed to parse company: {e}")
-    except NoSuchElementException:
+    cards = driver.execute_script(
+        """
+        return Array.from(document.querySelectorAll('.company-result')).map(function (card) {
+            var link = card.querySelector('.name-row-text__text');
+            return link ? [link.innerText, link.href, card.innerText] : null;
+        }).filter(Boolean);
+        """
+    )
+    if not cards:
         logger.error("No companies found on the page.")
+        return company_name_urls
+    for name, url, card_text in cards:
+        if not url:
+            logger.warning(f"Failed to parse company: no profile URL for {name}")
+            continue
+        company_name_urls.append({
+            "name": name.strip(),
+            "url": url,
+            "fingerprint": listing_fingerprint(card_text or ""),
+        })
     return company_name_urls
 
 
-def fetch_company_details(driver, company_name_urls):
-    """Fetch website and phone number for a given company URL."""
-    for company in company_name_urls:
+SOCIAL_NETWORKS = ("instagram", "facebook", "twitter", "linkedin")
+
+
+def _parse_contact_props(raw_props):
+    """Decode the CompanyContactLinks data-react-props JSON."""
+    if not raw_props:
+        return {}
+    try:
+        return json.loads(raw_props)
+    except json.JSONDecodeError:
+        # Fall back to decoding HTML entities left in the attribute
+        return json.loads(html.unescape(raw_props))
+
+
+def parse_company_page(page_source, base_url):
+    """Parse every company detail from a profile page's HTML in one pass.
+
+    Args:
+        page_source: HTML of the loaded company profile page
+        base_url: URL of the page, used to resolve relative links
+
+    Returns:
+        dict with website, score, social_links, phone_number and
+        has_contact_links (whether the CompanyContactLinks widget is present)
+    """
+    soup = BeautifulSoup(page_source, "html.parser")
+
+    def link(selector):
+        element = soup.select_one(selector)
+        href = element.get("href") if element else None
+        return urljoin(base_url, href.strip()) if href else None
+
+    score_element = soup.select_one("p.star-score-icon-and-score__text")
+    social_links = {}
+    for network in SOCIAL_NETWORKS:
+        href = link(f"a[data-testid='{network}']")
+        if href:
+            social_links[network] = href
+
+    contact_element = soup.select_one("[data-react-class='CompanyContactLinks']")
+    phone_number = None
+    if contact_element is not None:
         try:
-            driver.get(company['url'])
-            logger.info(f"Navigating to company URL: {company['url']}")
-            
-            # Wait for page to be fully loaded
-            logger.debug("Waiting for page load...")
-            WebDriverWait(driver, 10).until(
-                lambda driver: driver.execute_script('return document.readyState') == 'complete'
+            phone_number = _parse_contact_props(contact_element.get("data-react-props")).get("phoneNumber")
+        except json.JSONDecodeError:
+            logger.error("Failed to parse data-react-props JSON")
+
+    return {
+        "website": link("a[data-testid='company-listing-website']"),
+        "score": score_element.get_text(strip=True) if score_element else None,
+        "social_links": social_links,
+        "phone_number": phone_number,
+        "has_contact_links": contact_element is not None,
+    }
+
+
+def reveal_phone_number(driver):
+    """Click the reveal button and read the phone number from the updated props."""
+    try:
+        logger.debug("Attempting to find reveal button...")
+        reveal_button = WebDriverWait(driver, 5).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, "button[data-test-id='reveal-phone-number']"))
+        )
+        reveal_button.click()
+        logger.info("Successfully clicked reveal button")
+
+        contact_element = WebDriverWait(driver, 5).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "[data-react-class='CompanyContactLinks']"))
+        )
+        phone_number = _parse_contact_props(contact_element.get_attribute('data-react-props')).get('phoneNumber')
+        logger.info(f"Successfully extracted phone number: {phone_number}")
+        return phone_number
+    except TimeoutException as e:
+        logger.error(f"TimeoutException: {str(e)}")
+        logger.error("Current URL: " + driver.current_url)
+        return None
+    except json.JSONDecodeError:
+        logger.error("Failed to parse data-react-props JSON")
+        return None
+    except Exception as e:
+        logger.error(f"Unexpected error while extracting phone number: {str(e)}")
+        return None
+
+
+DETAIL_FIELDS = ("social_links", "phone_number", "website", "score")
+
+
+def load_company_details(driver, company):
+    """Open a company profile and return its website, phone number, score and social links.
+
+    The page source is pulled once and parsed in-process; the reveal button
+    is only clicked when the phone number is not already in the page's React
+    props. Companies without a website come back with website set to None.
+    """
+    driver.get(company['url'])
+    logger.info(f"Navigating to company URL: {company['url']}")
+    
+    # Wait for page to be fully loaded
+    logger.debug("Waiting for page load...")
+    WebDriverWait(driver, 10).until(
+        lambda driver: driver.execute_script('return document.readyState') == 'complete'
+    )
+    logger.info("Page load complete")
+
+    details = parse_company_page(driver.page_source, driver.current_url)
+    
+    # Check if website exists first
+    if not details['website']:
+        logger.info(f"Skipping company {company['name']} - no website found")
+        return {'website': None}
+
+    if not details['has_contact_links']:
+        # The widget may still be mounting; wait for it once and re-parse
+        try:
+            WebDriverWait(driver, 5).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "[data-react-class='CompanyContactLinks']"))
             )
-            logger.info("Page load complete")
+        except TimeoutException:
+            logger.error("Could not find main content - possible anti-bot protection")
+            logger.error(f"Page source preview: {driver.page_source[:1000]}")
+            raise Exception("Possible anti-bot protection")
+        details = parse_company_page(driver.page_source, driver.current_url)
 
-            # Log detailed page information
-            logger.info(f"Current URL: {driver.current_url}")
-            logger.info(f"Page Title: {driver.title}")
-            
-            # Check if website exists first
-            try:
-                website = driver.find_element(By.CSS_SELECTOR, "a[data-testid='company-listing-website']").get_attribute("href")
-                if not website:
-                    logger.info(f"Skipping company {company['name']} - no website found")
-                    continue
-            except NoSuchElementException:
-                logger.info(f"Skipping company {company['name']} - no website found")
+    phone_number = details['phone_number']
+    if not phone_number:
+        phone_number = reveal_phone_number(driver)
+
+    print('website', details['website'])
+    print('score', details['score'])
+    print(details['social_links'])
+    return {
+        'social_links': details['social_links'],
+        'phone_number': phone_number,
+        'website': details['website'],
+        'score': details['score'],
+    }
+
+
+def fetch_company_details(driver, company_name_urls, index=None, run_details=None):
+    """Fetch website, phone number, score and social links for each company URL.
+
+    With a CompanyIndex, profiles whose listing fingerprint is unchanged
+    since they were last fetched, within the index TTL, are not visited
+    again; their stored details are reused.
+
+    With a RunCompanyDetails shared by all workers, each profile URL is
+    resolved once per run; companies listed under several subcategories
+    get the details fetched the first time.
+    """
+    reused = 0
+    shared = 0
+    for company in company_name_urls:
+        url = company['url']
+        if run_details is not None:
+            claimed, details = run_details.claim(url)
+            if not claimed and details is None:
+                # The worker fetching it failed or lost its driver; try it here
+                claimed, details = run_details.claim(url)
+            if not claimed:
+                _apply_details(company, details)
+                shared += 1
                 continue
-                
-            # Check if we can find any main content
-            try:
-                logger.debug(f"Page Title: {driver.title}")
-                logger.debug(f"Current URL: {driver.current_url}")
-                
-                contact_element = WebDriverWait(driver, 5).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "[data-react-class='CompanyContactLinks']"))
-                )
-                logger.debug("Found element with data-react-class='CompanyContactLinks'")
-                logger.debug(f"Element HTML: {contact_element.get_attribute('innerHTML')}")
-                
-            except TimeoutException:
-                logger.error("Could not find main content - possible anti-bot protection")
-                logger.error(f"Page source preview: {driver.page_source[:1000]}")
-                raise Exception("Possible anti-bot protection")
-
-            # Now proceed with finding the button
-            try:
-                logger.debug("Attempting to find reveal button...")
-                reveal_button = WebDriverWait(driver, 5).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "button[data-test-id='reveal-phone-number']"))
-                )
-                
-                # Log page state before clicking
-                logger.debug(f"Page title: {driver.title}")
-                logger.debug(f"Current URL: {driver.current_url}")
-                
-                reveal_button.click()
-                logger.info("Successfully clicked reveal button")
-                
-                try:
-                    # Wait for the element containing data-react-props
-                    contact_element = WebDriverWait(driver, 5).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "[data-react-class='CompanyContactLinks']"))
-                    )
-                    
-                    # Get the data-react-props attribute
-                    props_json = contact_element.get_attribute('data-react-props')
-                    
-                    # Parse the JSON (need to handle HTML entities)
-                    import html
-                    decoded_props = html.unescape(props_json)
-                    import json
-                    props_data = json.loads(decoded_props)
-                    
-                    # Extract phone number
-                    phone_number = props_data.get('phoneNumber')
-                    logger.info(f"Successfully extracted phone number: {phone_number}")
-                    
-                except TimeoutException:
-                    logger.error("Could not find CompanyContactLinks element")
-                    phone_number = None
-                except json.JSONDecodeError:
-                    logger.error("Failed to parse data-react-props JSON")
-                    phone_number = None
-                except Exception as e:
-                    logger.error(f"Unexpected error while extracting phone number: {str(e)}")
-                    phone_number = None
-                
-            except TimeoutException as e:
-                logger.error(f"TimeoutException: {str(e)}")
-                # Log more detailed page state
-                logger.error("Current URL: " + driver.current_url)
-                logger.error("Page title: " + driver.title)
-                logger.error("Cookies: " + str(driver.get_cookies()))
-                phone_number = None
-            except Exception as e:
-                logger.error(f"Unexpected error: {str(e)}")
-                logger.error(f"Error type: {type(e).__name__}")
-                phone_number = None
-            
-            # get the score of the company
-            score = driver.find_element(By.CSS_SELECTOR, "p.star-score-icon-and-score__text").text
-            print('website', website)
-            print('score', score)
-            # Get social media links
-            social_links = {}
-            try:
-                # Check for Instagram
-                instagram = driver.find_element(By.CSS_SELECTOR, "a[data-testid='instagram']")
-                social_links['instagram'] = instagram.get_attribute("href")
-            except NoSuchElementException:
-                pass
-
-            try:
-                # Check for Facebook 
-                facebook = driver.find_element(By.CSS_SELECTOR, "a[data-testid='facebook']")
-                social_links['facebook'] = facebook.get_attribute("href")
-            except NoSuchElementException:
-                pass
-
-            try:
-                # Check for Twitter
-                twitter = driver.find_element(By.CSS_SELECTOR, "a[data-testid='twitter']")
-                social_links['twitter'] = twitter.get_attribute("href")
-            except NoSuchElementException:
-                pass
-
-            try:
-                # Check for LinkedIn
-                linkedin = driver.find_element(By.CSS_SELECTOR, "a[data-testid='linkedin']")
-                social_links['linkedin'] = linkedin.get_attribute("href")
-            except NoSuchElementException:
-                pass
-
-            print(social_links)
-            company['social_links'] = social_links
-            company['phone_number'] = phone_number
-            company['website'] = website
-            company['score'] = score
+
+        details = None
+        try:
+            if index is not None:
+                details = index.fresh_details(url, company.get('fingerprint'))
+                if details is not None:
+                    reused += 1
+            if details is None:
+                details = load_company_details(driver, company)
+                if index is not None:
+                    index.store(url, company.get('fingerprint'), details)
         except TimeoutException:
+            if not _driver_alive(driver):
+                raise
             logger.error(f"Timeout waiting for elements on page for company: {company['name']}")
-            continue
         except Exception as e:
+            if not _driver_alive(driver):
+                # Let the scheduler restart the driver and retry the whole subcategory
+                raise
             logger.error(f"Error processing company {company['name']}: {str(e)}")
-            continue
+        finally:
+            if run_details is not None:
+                run_details.resolve(url, details)
+        _apply_details(company, details)
             
+    if reused or shared:
+        logger.info(
+            f"Of {len(company_name_urls)} companies, reused stored details for {reused} unchanged "
+            f"and {shared} already fetched in this run"
+        )
     return company_name_urls
 
+
+def _driver_alive(driver):
+    """Check whether the WebDriver session still responds."""
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+def _apply_details(company, details):
+    """Copy fetched details onto a company, leaving missing fields unset."""
+    if details:
+        company.update({field: details[field] for field in DETAIL_FIELDS if details.get(field) is not None})